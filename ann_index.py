@@ -0,0 +1,242 @@
+import os
+import struct
+import threading
+import numpy as np
+
+FACE_DIM = 128
+INDEX_FILE = 'index.npz'
+LOG_FILE = 'inserts.log'
+
+def _sq_distances(vectors, points, point_sq_norms=None):
+    """Squared euclidean distances, shape (len(vectors), len(points))."""
+    if point_sq_norms is None:
+        point_sq_norms = np.einsum('ij,ij->i', points, points)
+    d2 = np.einsum('ij,ij->i', vectors, vectors)[:, None] - 2.0 * (vectors @ points.T) + point_sq_norms[None, :]
+    return np.maximum(d2, 0.0)
+
+def _nearest(vectors, points, point_sq_norms=None, chunk=16384):
+    """Index of the nearest point for every vector, chunked to bound memory."""
+    if point_sq_norms is None:
+        point_sq_norms = np.einsum('ij,ij->i', points, points)
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk]
+        out[start:start + chunk] = np.argmin(_sq_distances(block, points, point_sq_norms), axis=1)
+    return out
+
+class IVFIndex:
+    """
+    Inverted-file index over face encodings, pure NumPy (no GPU).
+    A coarse k-means quantizer splits the roll into `nlist` cells; a probe
+    is compared exactly against only the `nprobe` nearest cells.
+
+    On disk an index is a directory holding index.npz (compacted lists) and
+    inserts.log (records appended by signup since the last compaction).
+    """
+
+    def __init__(self, centroids):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        nlist = len(self.centroids)
+        # Each list is a set of chunks, concatenated lazily on first search.
+        # Chunks are never modified in place, only replaced, so a search can
+        # snapshot a cell's (ids, vectors) under the lock and use it outside.
+        self._ids = [[] for _ in range(nlist)]
+        self._vecs = [[] for _ in range(nlist)]
+        self._lock = threading.Lock()
+        self.size = 0
+        self.log_offset = 0
+
+    # ---------------- Build ----------------
+    @classmethod
+    def train(cls, sample, nlist, iters=10, seed=0):
+        """Lloyd's k-means over a training sample (a few dozen points per list is plenty)."""
+        sample = np.asarray(sample, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, len(sample)))
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = _nearest(sample, centroids)
+            counts = np.bincount(assign, minlength=nlist)
+            # Per-cell sums via one sort + reduceat (np.add.at is far slower)
+            order = np.argsort(assign, kind='stable')
+            cells, starts = np.unique(assign[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[cells] = np.add.reduceat(sample[order], starts)
+            empty = counts == 0
+            centroids[~empty] = sums[~empty] / counts[~empty, None]
+            # Re-seed empty cells so no list is wasted
+            if empty.any():
+                centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        return cls(centroids)
+
+    def assign(self, vectors):
+        return _nearest(vectors, self.centroids, self.centroid_sq_norms)
+
+    def add(self, voter_ids, vectors):
+        voter_ids = np.asarray(voter_ids, dtype=object)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, FACE_DIM)
+        lists = self.assign(vectors)
+        with self._lock:
+            for cell in np.unique(lists):
+                mask = lists == cell
+                self._ids[cell].append(voter_ids[mask])
+                self._vecs[cell].append(vectors[mask])
+            self.size += len(vectors)
+
+    def _list(self, cell):
+        """A cell's (ids, vectors), compacted into one chunk each; caller holds the lock."""
+        if len(self._vecs[cell]) > 1:
+            self._ids[cell] = [np.concatenate(self._ids[cell])]
+            self._vecs[cell] = [np.concatenate(self._vecs[cell])]
+        if not self._vecs[cell]:
+            return np.empty(0, dtype=object), np.empty((0, FACE_DIM), dtype=np.float32)
+        return self._ids[cell][0], self._vecs[cell][0]
+
+    # ---------------- Search ----------------
+    def search(self, probe, k=1, nprobe=8):
+        """Returns (voter_ids, distances) of the k nearest stored vectors."""
+        probe = np.asarray(probe, dtype=np.float32).reshape(1, FACE_DIM)
+        nprobe = min(nprobe, len(self.centroids))
+        coarse = _sq_distances(probe, self.centroids, self.centroid_sq_norms)[0]
+        cells = np.argpartition(coarse, nprobe - 1)[:nprobe]
+
+        with self._lock:
+            ids, vecs = zip(*(self._list(c) for c in cells))
+        ids, vecs = np.concatenate(ids), np.concatenate(vecs)
+        if len(ids) == 0:
+            return ids, np.empty(0, dtype=np.float32)
+        dist = np.sqrt(_sq_distances(probe, vecs)[0])
+        k = min(k, len(dist))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return ids[top], dist[top]
+
+    def match(self, probe, tolerance=0.6, min_margin=0.0, nprobe=8):
+        """Same result shape as FaceMatcher.match, runner-up taken over distinct voters."""
+        # Re-enrolled voters may appear twice until the next compaction
+        ids, dist = self.search(probe, k=8, nprobe=nprobe)
+        if len(ids) == 0:
+            return None
+        runner_up_distance = float('inf')
+        for voter_id, d in zip(ids[1:], dist[1:]):
+            if voter_id != ids[0]:
+                runner_up_distance = float(d)
+                break
+        distance = float(dist[0])
+        margin = runner_up_distance - distance
+        matched = distance <= tolerance
+        return {
+            'voter_id': ids[0],
+            'distance': distance,
+            'runner_up_distance': runner_up_distance,
+            'margin': margin,
+            'matched': matched,
+            'ambiguous': matched and margin < min_margin,
+        }
+
+    # ---------------- Persistence ----------------
+    def save(self, path):
+        """Write a compacted index.npz and truncate the insert log."""
+        os.makedirs(path, exist_ok=True)
+        ids, vecs, offsets = [], [], [0]
+        with self._lock:
+            for cell in range(len(self.centroids)):
+                cell_ids, cell_vecs = self._list(cell)
+                ids.append(cell_ids)
+                vecs.append(cell_vecs)
+                offsets.append(offsets[-1] + len(cell_ids))
+        tmp = os.path.join(path, INDEX_FILE + '.tmp')
+        with open(tmp, 'wb') as fh:
+            np.savez(
+                fh, centroids=self.centroids,
+                ids=np.concatenate(ids).astype(str) if self.size else np.empty(0, dtype=str),
+                vectors=np.concatenate(vecs), offsets=np.asarray(offsets, dtype=np.int64)
+            )
+        os.replace(tmp, os.path.join(path, INDEX_FILE))
+        open(os.path.join(path, LOG_FILE), 'wb').close()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(os.path.join(path, INDEX_FILE)) as data:
+            index = cls(data['centroids'])
+            ids, vecs, offsets = data['ids'].astype(object), data['vectors'], data['offsets']
+        for cell in range(len(index.centroids)):
+            lo, hi = offsets[cell], offsets[cell + 1]
+            if hi > lo:
+                index._ids[cell].append(ids[lo:hi])
+                index._vecs[cell].append(vecs[lo:hi])
+        index.size = len(ids)
+        index.log_offset = index.replay_log(path)
+        return index
+
+    @staticmethod
+    def append_log(path, voter_id, vector):
+        """Durably record one insert without rewriting the whole index."""
+        raw_id = voter_id.encode('utf-8')
+        record = struct.pack('>H', len(raw_id)) + raw_id + np.asarray(vector, dtype=np.float32).tobytes()
+        with open(os.path.join(path, LOG_FILE), 'ab') as fh:
+            fh.write(record)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def replay_log(self, path, offset=0):
+        """Apply log records from byte `offset`; returns the offset reached."""
+        log_path = os.path.join(path, LOG_FILE)
+        if not os.path.exists(log_path):
+            return offset
+        vec_size = FACE_DIM * 4
+        ids, vecs = [], []
+        with open(log_path, 'rb') as fh:
+            fh.seek(offset)
+            while True:
+                head = fh.read(2)
+                if len(head) < 2:
+                    break
+                (id_len,) = struct.unpack('>H', head)
+                body = fh.read(id_len + vec_size)
+                if len(body) < id_len + vec_size:
+                    break # torn write at the tail; ignored
+                ids.append(body[:id_len].decode('utf-8'))
+                vecs.append(np.frombuffer(body[id_len:], dtype=np.float32))
+                offset += 2 + id_len + vec_size
+        if ids:
+            self.add(ids, np.stack(vecs))
+        return offset
+
+
+class PersistentIVFIndex:
+    """
+    Process-local view of an on-disk IVFIndex. Inserts from any worker go to
+    the shared log and are replayed here on the next lookup; a rebuilt
+    index.npz is reloaded wholesale.
+    """
+
+    def __init__(self):
+        self.index = None
+        self._path = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Returns the current IVFIndex at `path`, or None if none has been built."""
+        try:
+            mtime = os.stat(os.path.join(path, INDEX_FILE)).st_mtime_ns
+            log_size = os.stat(os.path.join(path, LOG_FILE)).st_size
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self.index is None or path != self._path or mtime != self._mtime:
+                self.index = IVFIndex.load(path)
+                self._path, self._mtime = path, mtime
+            elif log_size > self.index.log_offset:
+                self.index.log_offset = self.index.replay_log(path, self.index.log_offset)
+            return self.index
+
+    @staticmethod
+    def insert(path, voter_id, vector):
+        """Append to the index at `path` if one has been built (no-op otherwise)."""
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            IVFIndex.append_log(path, voter_id, vector)
+
+ann_index = PersistentIVFIndex()
@@ -39,13 +39,22 @@ from firebase_admin import credentials
 import seed_db 
 
 from routes import main_bp
+from commands import register_commands
+from face_worker import face_pool
+from vote_appender import vote_appender
+from tally import ensure_tallies
+from migrations import ensure_indexes
+from storage import init_storage, attach_storage
+from metrics import metrics
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
-    # 1. Initialize SQL Database
+    # 1. Initialize SQL Database (with the storage profile: SQLite pragmas / server pool)
+    init_storage(app)
     db.init_app(app)
+    attach_storage(app)
     
     # 2. Initialize Firebase (Realtime Database)
     # Check if already initialized to prevent errors during auto-reload
@@ -66,14 +75,24 @@ def create_app():
         except Exception as e:
             print(f"❌ Firebase Init Error: {e}")
 
-    # 3. Register Blueprints
+    # 3. Register Blueprints & CLI Commands
     app.register_blueprint(main_bp)
+    register_commands(app)
+    face_pool.init_app(app)
+    vote_appender.init_app(app)
+    metrics.init_app(app)
     
     # 4. Create Tables & Seed Data
     with app.app_context():
         db.create_all()
+        # Indexes added to models after their table was first created
+        _, skipped = ensure_indexes()
+        for name, duplicates in skipped.items():
+            print(f"⚠️ Index {name} not created: {len(duplicates)}+ duplicate value(s). Run 'flask migrate-indexes'.")
         # Run the unified seeder (Admin, Candidates, Voters, etc.)
         seed_db.run()
+        # Vote counters for ledgers recorded before vote_tally existed
+        ensure_tallies()
 
     return app
 
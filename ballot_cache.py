@@ -0,0 +1,80 @@
+import random
+import threading
+import time
+
+from models import Candidate, AssemblyConstituency
+
+FILLER_PARTIES = ["Tech Future", "Green Earth", "Youth Voice", "Digital Front", "Urban Reform"]
+
+def party_logo_url(party):
+    return f"https://ui-avatars.com/api/?name={party.replace(' ', '+')}&background=random&color=fff&size=128"
+
+class BallotUnavailable(Exception):
+    """The voter's assembly has no mapped constituency, or that seat has no candidates."""
+
+class BallotCache:
+    """
+    Ready-to-send ballot candidate lists, one per roll assembly (resolved to
+    its constituency through AssemblyConstituency), served from memory.
+    Cleared by nomination approval/rejection; the TTL only exists so reviews
+    and mappings handled by another worker process show up too.
+    """
+
+    def __init__(self):
+        self._ballots = {} # assembly -> (candidates_json, unavailable_reason, built_at)
+        self._lock = threading.Lock()
+
+    def get(self, assembly, ttl):
+        """Candidates JSON for a voter of this assembly; raises BallotUnavailable."""
+        entry = self._ballots.get(assembly)
+        if entry is None or time.monotonic() - entry[2] > ttl:
+            with self._lock:
+                try:
+                    entry = (self._build(assembly), None, time.monotonic())
+                except BallotUnavailable as e:
+                    # Remembered like a ballot, so a bad roll entry doesn't hit the database on every poll
+                    entry = (None, str(e), time.monotonic())
+                self._ballots[assembly] = entry
+        if entry[1] is not None:
+            raise BallotUnavailable(entry[1])
+        return entry[0]
+
+    def invalidate(self):
+        with self._lock:
+            self._ballots.clear()
+
+    @staticmethod
+    def _build(assembly):
+        if not assembly:
+            raise BallotUnavailable('Voter has no assembly on the roll')
+        seat = AssemblyConstituency.query.filter_by(assembly=assembly).first()
+        if seat is None:
+            raise BallotUnavailable(f'Assembly {assembly!r} is not mapped to a constituency')
+        constituency = seat.constituency
+        db_candidates = Candidate.query.filter_by(constituency=constituency).all()
+        if not db_candidates:
+            raise BallotUnavailable(f'No candidates contest {constituency!r} (assembly {assembly!r})')
+
+        cands_json = []
+        for c in db_candidates:
+            cands_json.append({
+                'candidate_id': c.candidate_id, 'name': c.name, 'party': c.party,
+                'constituency': c.constituency, 'details': "Official Candidate",
+                'logo_url': party_logo_url(c.party),
+                'social_link': '#'
+            })
+
+        # Dummy Filler with Logos (seeded per seat so a cached ballot stays stable)
+        if len(cands_json) < 20:
+            rng = random.Random(constituency)
+            for i in range(len(cands_json), 25):
+                p = rng.choice(FILLER_PARTIES)
+                cands_json.append({
+                    'candidate_id': f'DUMMY_{i}', 'name': f'Candidate {chr(65+i)}', 'party': p,
+                    'constituency': 'General', 'details': 'Independent Candidate',
+                    'logo_url': party_logo_url(p),
+                    'social_link': '#'
+                })
+        return cands_json
+
+ballot_cache = BallotCache()
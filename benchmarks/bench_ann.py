@@ -0,0 +1,77 @@
+"""
+Recall / latency of the IVF face index against exact (brute-force) search.
+
+    python benchmarks/bench_ann.py --voters 1000000 --queries 200 --nprobe 4 8 16
+
+Encodings are synthetic: voters are scattered around a few thousand
+"look-alike" centres so the data has the clustered shape real face
+encodings have, and each probe is an enrolled encoding plus camera noise.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ann_index import IVFIndex  # noqa: E402
+from face_index import FaceMatcher, FACE_DIM  # noqa: E402
+
+def synthetic_roll(n, centres, seed):
+    rng = np.random.default_rng(seed)
+    hubs = rng.normal(0, 0.12, size=(centres, FACE_DIM)).astype(np.float32)
+    vectors = hubs[rng.integers(0, centres, n)] + rng.normal(0, 0.05, size=(n, FACE_DIM)).astype(np.float32)
+    return vectors
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--voters', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--centres', type=int, default=2000)
+    parser.add_argument('--nlist', type=int, default=0, help='default: sqrt(voters)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed + 1)
+    vectors = synthetic_roll(args.voters, args.centres, args.seed)
+    voter_ids = [f"V{i}" for i in range(args.voters)]
+    probes = vectors[rng.integers(0, args.voters, args.queries)] + rng.normal(0, 0.02, size=(args.queries, FACE_DIM)).astype(np.float32)
+
+    exact = FaceMatcher(voter_ids, vectors)
+    truth, exact_times = [], []
+    for probe in probes:
+        t = time.perf_counter()
+        truth.append(exact.match(probe)['voter_id'])
+        exact_times.append(time.perf_counter() - t)
+
+    nlist = args.nlist or max(1, int(np.sqrt(args.voters)))
+    t = time.perf_counter()
+    index = IVFIndex.train(vectors[rng.choice(args.voters, min(args.voters, 50 * nlist), replace=False)], nlist)
+    index.add(voter_ids, vectors)
+    build_s = time.perf_counter() - t
+
+    results = {
+        'voters': args.voters, 'queries': args.queries, 'nlist': nlist, 'build_s': round(build_s, 2),
+        'exact': {'p50_ms': percentile_ms(exact_times, 50), 'p95_ms': percentile_ms(exact_times, 95)},
+        'ivf': [],
+    }
+    for nprobe in args.nprobe:
+        hits, times = 0, []
+        for probe, expected in zip(probes, truth):
+            t = time.perf_counter()
+            ids, _ = index.search(probe, k=1, nprobe=nprobe)
+            times.append(time.perf_counter() - t)
+            hits += int(len(ids) and ids[0] == expected)
+        results['ivf'].append({
+            'nprobe': nprobe, 'recall_at_1': round(hits / args.queries, 4),
+            'p50_ms': percentile_ms(times, 50), 'p95_ms': percentile_ms(times, 95),
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
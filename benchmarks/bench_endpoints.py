@@ -0,0 +1,223 @@
+"""
+End-to-end latency of the voting hot paths through the Flask test client,
+against synthetic elections (synthetic.py) of several sizes:
+
+    /api/face_scan      stubbed encoder (search + ballot activation only) and,
+                        with --image and face_recognition installed, the real one
+    /api/poll_ballot    /api/cast_vote    /api/live_stats
+    /api/verify_chain   incremental, and ?full=1
+    /signup             form post without a photo
+
+    python benchmarks/bench_endpoints.py --sizes 10000,100000 --requests 300 --out results.json
+    python benchmarks/bench_endpoints.py --sizes 10000 --compare results.json
+
+Every size runs in its own process on a fresh copy of the database.
+Results are JSON (p50/p95/p99/mean in ms, requests/s, errors per endpoint),
+tagged with the git commit, so runs from two commits can be compared with
+--compare.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+FULL_VERIFY_RUNS = 3 # a full re-verify walks the whole ledger; a few samples are enough
+
+def make_app(db_path):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    os.environ['FACE_SCAN_ASYNC'] = '0' # time the encoder inside the request, not a job poll
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+    Config.FACE_SCAN_ASYNC = False
+    from app import create_app
+    return create_app()
+
+def summarize(endpoint, latencies, errors, elapsed, **extra):
+    ms = np.asarray(latencies) * 1000
+    return dict(extra, endpoint=endpoint, requests=len(latencies), errors=errors,
+                p50_ms=round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+                p95_ms=round(float(np.percentile(ms, 95)), 3) if len(ms) else None,
+                p99_ms=round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+                mean_ms=round(float(ms.mean()), 3) if len(ms) else None,
+                rps=round(len(latencies) / elapsed, 1) if elapsed else None)
+
+class Timer:
+    """Collects per-request latencies for one endpoint."""
+
+    def __init__(self, endpoint, **extra):
+        self.endpoint, self.extra = endpoint, extra
+        self.latencies, self.errors, self.elapsed = [], 0, 0.0
+
+    def __call__(self, request, ok=lambda r: r.status_code < 400):
+        started = time.perf_counter()
+        response = request()
+        took = time.perf_counter() - started
+        self.latencies.append(took)
+        self.elapsed += took
+        self.errors += not ok(response)
+        return response
+
+    def result(self):
+        return summarize(self.endpoint, self.latencies, self.errors, self.elapsed, **self.extra)
+
+def bench_size(voters, requests, seed, image):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    shutil.copy(os.path.join(ROOT, 'election_nominations.db'), db_path)
+    app = make_app(db_path)
+
+    import routes
+    from models import db, Voter, FaceEmbedding, Vote
+    from synthetic import ElectionGenerator
+    from utils import HAS_FR, encoding_from_bytes
+
+    booths = max(10, voters // 1000)
+    constituencies = max(5, booths // 10)
+    with app.app_context():
+        started = time.perf_counter()
+        ElectionGenerator(voters, constituencies, booths, constituencies * 8, voters // 2, seed=seed,
+                          prefix='BENCH', echo=lambda *a: None).run()
+        generated = time.perf_counter() - started
+
+        # Voters left to vote, with their booth and stored encoding (what the stub encoder "sees")
+        voted = {h for (h,) in db.session.query(Vote.voter_hash)}
+        pending = []
+        for voter_id, part_no, assembly, blob in db.session.query(
+                Voter.voter_id, Voter.part_no, Voter.assembly, FaceEmbedding.encoding).join(
+                FaceEmbedding, FaceEmbedding.voter_id == Voter.voter_id).filter(Voter.voter_id.like('BENCH%')):
+            if hashlib.sha256(voter_id.encode()).hexdigest() not in voted:
+                pending.append((voter_id, assembly, part_no, encoding_from_bytes(blob)))
+        # Generator booth numbering: booth j serves seat j % M with part j // M + 1
+        seat = {f'BENCH AC-{i + 1}': i for i in range(constituencies)}
+        booth_of = lambda assembly, part_no: f"BENCH-B{(int(part_no.split('-')[1]) - 1) * constituencies + seat[assembly] + 1}"
+        pending = [(v, booth_of(a, p), enc) for v, a, p, enc in pending[:requests]]
+        chain_length = Vote.query.count()
+
+    client = app.test_client()
+    common = {'voters': voters, 'chain_length': chain_length}
+    results = []
+
+    # ---------------- Face scan (stubbed encoder) -> poll -> cast ----------------
+    probes = {voter_id.encode(): enc for voter_id, _, enc in pending}
+    real_encoder = routes.encode_best_face
+    routes.encode_best_face = lambda frames, *a, **kw: {'encoding': probes[frames[0]], 'frame': 0, 'frames': len(frames)}
+    scan, poll, cast = Timer('/api/face_scan', encoder='stub', **common), Timer('/api/poll_ballot', **common), \
+        Timer('/api/cast_vote', **common)
+    for voter_id, booth, _ in pending:
+        r = scan(lambda: client.post('/api/face_scan', data={'booth_number': booth, 'face': (io.BytesIO(voter_id.encode()), 'f.jpg')},
+                                     content_type='multipart/form-data'), ok=lambda r: r.get_json().get('activate'))
+        if not r.get_json().get('activate'):
+            continue
+        ballot = poll(lambda: client.get(f'/api/poll_ballot/{booth}'), ok=lambda r: r.get_json().get('voter_id') == voter_id).get_json()
+        candidate = ballot['candidates'][0]['candidate_id'] if ballot.get('candidates') else 'C1'
+        cast(lambda: client.post('/api/cast_vote', json={'voter_id': voter_id, 'candidate_id': candidate, 'booth_number': booth}))
+    routes.encode_best_face = real_encoder
+    results += [scan.result(), poll.result(), cast.result()]
+
+    # ---------------- Face scan (real encoder) ----------------
+    if image and HAS_FR:
+        with open(image, 'rb') as fh:
+            frame = fh.read()
+        real = Timer('/api/face_scan', encoder='real', **common)
+        for _ in range(requests):
+            real(lambda: client.post('/api/face_scan', data={'booth_number': 'BENCH-B1', 'face': (io.BytesIO(frame), 'f.jpg')},
+                                     content_type='multipart/form-data'))
+        results.append(real.result())
+    elif image:
+        print('⚠️ face_recognition is not installed; skipping the real encoder', file=sys.stderr)
+
+    # ---------------- Read paths ----------------
+    stats = Timer('/api/live_stats', **common)
+    for _ in range(requests):
+        stats(lambda: client.get('/api/live_stats'))
+    results.append(stats.result())
+
+    verify = Timer('/api/verify_chain', mode='incremental', **common)
+    for _ in range(requests):
+        verify(lambda: client.get('/api/verify_chain'), ok=lambda r: r.get_json()['is_valid'])
+    results.append(verify.result())
+
+    full = Timer('/api/verify_chain', mode='full', **common)
+    official = app.test_client()
+    with official.session_transaction() as session:
+        session['eci'] = True # ?full=1 is for officials only
+    for _ in range(FULL_VERIFY_RUNS):
+        full(lambda: official.get('/api/verify_chain?full=1'), ok=lambda r: r.get_json()['is_valid'])
+    results.append(full.result())
+
+    # ---------------- Enrollment ----------------
+    signup = Timer('/signup', **common)
+    for i in range(requests):
+        signup(lambda: client.post('/signup', data={'name': f'Bench Signup {i}', 'dob': '1990-01-01',
+                                                    'aadhaar': f'SIGNUP{i:010d}', 'voter_id': f'SIGNUP{i:06d}'}),
+               ok=lambda r: r.status_code == 302 and r.location.endswith('/'))
+    results.append(signup.result())
+
+    print(json.dumps({'voters': voters, 'generate_seconds': round(generated, 1), 'results': results}))
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, current):
+    key = lambda r: (r['voters'], r['endpoint'], r.get('encoder'), r.get('mode'))
+    old = {key(r): r for r in baseline['results']}
+    print(f"{'voters':>8}  {'endpoint':<34} {'p50 ms':>17} {'p95 ms':>17}")
+    for r in current['results']:
+        before = old.get(key(r))
+        if not before or r['p50_ms'] is None or before['p50_ms'] is None:
+            continue
+        name = r['endpoint'] + ''.join(f" [{r[k]}]" for k in ('encoder', 'mode') if r.get(k))
+        cells = [f"{before[p]:>7.2f}→{r[p]:<7.2f}{(r[p] / before[p] - 1) * 100 if before[p] else 0:+5.0f}%"
+                 for p in ('p50_ms', 'p95_ms')]
+        print(f"{r['voters']:>8}  {name:<34} {cells[0]:>17} {cells[1]:>17}")
+
+def main():
+    if sys.argv[1:2] == ['--size']:
+        voters, requests, seed = map(int, sys.argv[2:5])
+        return bench_size(voters, requests, seed, sys.argv[5] or None)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated voter counts (half of them have voted).')
+    parser.add_argument('--requests', type=int, default=200, help='Samples per endpoint and size.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--image', default='', help='Face photo for the real-encoder run.')
+    parser.add_argument('--out', help='Write the JSON results here as well.')
+    parser.add_argument('--compare', help='Earlier --out file to diff latencies against.')
+    args = parser.parse_args()
+
+    report = {'commit': git_commit(), 'python': platform.python_version(), 'machine': platform.machine(),
+              'cpus': os.cpu_count(), 'started': datetime.utcnow().isoformat(), 'requests': args.requests,
+              'seed': args.seed, 'sizes': [], 'results': []}
+    for voters in (int(s) for s in args.sizes.split(',')):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--size', str(voters), str(args.requests),
+                               str(args.seed), args.image], capture_output=True, text=True, check=True)
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        report['sizes'].append({'voters': voters, 'generate_seconds': run['generate_seconds']})
+        report['results'] += run['results']
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(json.load(fh), report)
+
+if __name__ == '__main__':
+    main()
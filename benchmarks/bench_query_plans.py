@@ -0,0 +1,106 @@
+"""
+EXPLAIN QUERY PLAN and latency of the hot queries, before and after the
+index pack, on a copy of election_nominations.db padded with synthetic rows.
+
+    python benchmarks/bench_query_plans.py --votes 200000 --runs 50
+
+"After" indexes are added by migrations.ensure_indexes, the same code path
+as `flask migrate-indexes`, so this also exercises the in-place migration.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# (name, sql, params) mirroring the ORM queries in routes.py
+QUERIES = [
+    ('double_vote_check', 'SELECT id FROM vote WHERE voter_hash = ? LIMIT 1', ('VOTER_HASH',)),
+    ('receipt_printer', 'SELECT * FROM vote WHERE booth_number = ? ORDER BY timestamp DESC LIMIT 1', ('B7',)),
+    ('activity_feed', 'SELECT * FROM vote ORDER BY timestamp DESC LIMIT 10', ()),
+    ('receipt_lookup', 'SELECT id FROM vote WHERE receipt = ?', ('RECEIPT',)),
+    ('ballot_machine', 'SELECT * FROM ballot_status WHERE booth_number = ? AND is_active = 1 LIMIT 1', ('B7',)),
+    ('nomination_list', 'SELECT id FROM nominations ORDER BY created_at DESC LIMIT 50', ()),
+    ('nomination_status', "SELECT id FROM nominations WHERE status = ?", ('Approved',)),
+]
+
+def pad(conn, votes, nominations, seed):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    base = conn.execute('SELECT COALESCE(MAX(id), 0) FROM vote').fetchone()[0]
+    rows = []
+    for i in range(1, votes + 1):
+        ts = start + timedelta(seconds=i)
+        rows.append((base + i, hashlib.sha256(f'V{i}'.encode()).hexdigest(), f'C{rng.randint(1, 10)}',
+                     f'B{rng.randint(1, 500)}', ts, hashlib.sha256(f'R{i}'.encode()).hexdigest(), '0' * 64, '0' * 64, 0))
+    conn.executemany('INSERT INTO vote (id, voter_hash, candidate_id, booth_number, timestamp, receipt, '
+                     'previous_hash, block_hash, nonce) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.executemany('INSERT INTO ballot_status (voter_id, booth_number, is_active, timestamp) VALUES (?, ?, ?, ?)',
+                     [(f'V{i}', f'B{rng.randint(1, 500)}', i % 1000 == 0, start) for i in range(votes)])
+    conn.executemany('INSERT INTO nominations (name, status, created_at) VALUES (?, ?, ?)',
+                     [(f'N{i}', rng.choice(['Pending', 'Approved', 'Rejected']), start + timedelta(minutes=i))
+                      for i in range(nominations)])
+    conn.commit()
+    return rows[votes // 2]
+
+def measure(conn, sample, runs):
+    out = {}
+    for name, sql, params in QUERIES:
+        params = tuple({'VOTER_HASH': sample[1], 'RECEIPT': sample[5]}.get(p, p) for p in params)
+        plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+        started = time.perf_counter()
+        for _ in range(runs):
+            conn.execute(sql, params).fetchall()
+        out[name] = {'plan': plan, 'ms': round((time.perf_counter() - started) / runs * 1000, 3)}
+    return out
+
+def migrate(db_path):
+    from flask import Flask
+    from models import db
+    from migrations import ensure_indexes
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    db.init_app(app)
+    with app.app_context():
+        return ensure_indexes()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--votes', type=int, default=200000)
+    parser.add_argument('--nominations', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    shutil.copy(os.path.join(ROOT, 'election_nominations.db'), db_path)
+    conn = sqlite3.connect(db_path)
+    # The shipped file predates the receipt index too; start from a bare schema
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall():
+        conn.execute(f'DROP INDEX {name}')
+    sample = pad(conn, args.votes, args.nominations, args.seed)
+    conn.execute('ANALYZE')
+
+    before = measure(conn, sample, args.runs)
+    created, skipped = migrate(db_path)
+    conn.execute('ANALYZE')
+    after = measure(conn, sample, args.runs)
+
+    print(json.dumps({
+        'votes': args.votes, 'created': created, 'skipped': list(skipped),
+        'queries': {name: {'before': before[name], 'after': after[name],
+                           'speedup': round(before[name]['ms'] / max(after[name]['ms'], 1e-6), 1)}
+                    for name in before},
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
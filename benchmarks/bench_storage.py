@@ -0,0 +1,123 @@
+"""
+Several app processes (as gunicorn workers would be) sharing one SQLite
+file: votes cast through each process's writer while reader threads poll
+the booth and results endpoints. Runs once with SQLite's defaults and once
+with the storage profile (WAL, busy_timeout, synchronous=NORMAL, mmap).
+
+    python benchmarks/bench_storage.py --workers 4 --votes 400 --threads 8 --readers 2
+
+Reports votes/s, reads/s, failures and chain forks for each profile.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+PROFILES = {
+    # What a plain sqlite3 connection gets: rollback journal, FULL sync, 5s busy wait, no mmap
+    'default': {'SQLITE_WAL': '0', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_MMAP_SIZE': '0', 'SQLITE_BUSY_TIMEOUT_MS': '5000'},
+    'tuned': {},
+}
+
+def make_app():
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+    from app import create_app
+    return create_app()
+
+def init_db(votes):
+    from datetime import datetime
+    app = make_app()
+    from models import db, BallotStatus
+    with app.app_context():
+        db.session.execute(db.insert(BallotStatus), [
+            {'voter_id': f'BENCH{i}', 'booth_number': f'B{i % 20}', 'is_active': True, 'timestamp': datetime.utcnow()}
+            for i in range(votes)
+        ])
+        db.session.commit()
+
+def worker(index, workers, votes, threads, readers, start_at):
+    app = make_app()
+    from vote_appender import vote_appender
+    mine = list(range(index, votes, workers))
+    statuses, reads, read_errors = [], [0], [0]
+    done = threading.Event()
+
+    def cast(offset):
+        for i in mine[offset::threads]:
+            with app.app_context():
+                statuses.append(vote_appender.cast(f'BENCH{i}', f'C{i % 10 + 1}', f'B{i % 20}')[0])
+
+    def read():
+        client = app.test_client()
+        while not done.is_set():
+            for url in ('/api/live_stats', f'/api/poll_receipt/B{reads[0] % 20}'):
+                if client.get(url).status_code >= 500:
+                    read_errors[0] += 1
+                reads[0] += 1
+
+    time.sleep(max(0.0, start_at - time.time())) # all processes start together
+    started = time.perf_counter()
+    pool = [threading.Thread(target=cast, args=(t,)) for t in range(threads)]
+    read_pool = [threading.Thread(target=read) for _ in range(readers)]
+    for t in pool + read_pool: t.start()
+    for t in pool: t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for t in read_pool: t.join()
+    print(json.dumps({'ok': statuses.count(200), 'failed': len(statuses) - statuses.count(200),
+                      'reads': reads[0], 'read_errors': read_errors[0], 'seconds': elapsed}))
+
+def run(profile, args):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    shutil.copy(os.path.join(ROOT, 'election_nominations.db'), db_path)
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, **PROFILES[profile])
+    me = os.path.abspath(__file__)
+    subprocess.run([sys.executable, me, '--init', str(args.votes)], env=env, check=True, capture_output=True)
+
+    start_at = time.time() + 5 # leaves time for every process to import and build its app
+    procs = [subprocess.Popen([sys.executable, me, '--worker', str(i), str(args.workers), str(args.votes),
+                               str(args.threads), str(args.readers), str(start_at)],
+                              env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+             for i in range(args.workers)]
+    results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+
+    conn = sqlite3.connect(db_path)
+    prev = [p for (p,) in conn.execute('SELECT previous_hash FROM vote')]
+    journal = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    seconds = max(r['seconds'] for r in results)
+    return {
+        'profile': profile, 'journal_mode': journal, 'workers': args.workers, 'seconds': round(seconds, 2),
+        'votes_ok': sum(r['ok'] for r in results), 'votes_failed': sum(r['failed'] for r in results),
+        'votes_per_s': round(sum(r['ok'] for r in results) / seconds, 1),
+        'reads_per_s': round(sum(r['reads'] for r in results) / seconds, 1),
+        'read_errors': sum(r['read_errors'] for r in results),
+        'forks': len(prev) - len(set(prev)),
+    }
+
+def main():
+    if sys.argv[1:2] == ['--init']:
+        return init_db(int(sys.argv[2]))
+    if sys.argv[1:2] == ['--worker']:
+        i, workers, votes, threads, readers = map(int, sys.argv[2:7])
+        return worker(i, workers, votes, threads, readers, float(sys.argv[7]))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--votes', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps([run(profile, args) for profile in PROFILES], indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Vote ledger write throughput: the old per-request path (read tip, insert,
+commit per vote) against the single-writer appender with group commit.
+
+    python benchmarks/bench_vote_append.py --votes 2000 --threads 16
+
+Each run uses a fresh SQLite file. Besides votes/second it reports how
+many chain forks (two blocks sharing one previous_hash) each path left.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+def make_app(db_path):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    from app import create_app
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+    return create_app()
+
+def legacy_cast(voter_id, candidate_id, booth_number):
+    """The api_cast_vote body as it was before the appender."""
+    from models import db, Vote, BallotStatus
+    from blockchain import BlockchainUtils
+    from tally import increment_tally
+    bs = BallotStatus.query.filter_by(voter_id=voter_id, booth_number=booth_number, is_active=True).first()
+    if not bs: return 403
+    try:
+        last_vote = Vote.query.order_by(Vote.id.desc()).first()
+        prev_hash = last_vote.block_hash if last_vote else "0" * 64
+        timestamp = datetime.utcnow()
+        receipt = BlockchainUtils.generate_receipt(voter_id, candidate_id, timestamp)
+        block_hash = BlockchainUtils.calculate_hash("PENDING", prev_hash, candidate_id, timestamp, 0)
+        db.session.add(Vote(voter_hash=hashlib.sha256(voter_id.encode()).hexdigest(), candidate_id=candidate_id,
+                            booth_number=booth_number, receipt=receipt, timestamp=timestamp,
+                            previous_hash=prev_hash, block_hash=block_hash, nonce=0))
+        increment_tally(candidate_id, booth_number)
+        bs.is_active = False
+        db.session.commit()
+        return 200
+    except Exception:
+        db.session.rollback()
+        return 500
+
+def run(path, votes, threads, batch_size):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = make_app(db_path)
+    app.config['VOTE_BATCH_SIZE'] = batch_size
+    from models import db, Vote, BallotStatus
+    from vote_appender import vote_appender
+
+    with app.app_context():
+        db.session.execute(db.insert(BallotStatus), [
+            {'voter_id': f'BENCH{i}', 'booth_number': f'B{i % 50}', 'is_active': True, 'timestamp': datetime.utcnow()}
+            for i in range(votes)
+        ])
+        db.session.commit()
+
+    statuses = []
+    def worker(offset):
+        for i in range(offset, votes, threads):
+            with app.app_context():
+                args = (f'BENCH{i}', f'C{i % 10 + 1}', f'B{i % 50}')
+                statuses.append(legacy_cast(*args) if path == 'legacy' else vote_appender.cast(*args)[0])
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool: t.start()
+    for t in pool: t.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        prev = [p for (p,) in db.session.query(Vote.previous_hash)]
+    return {
+        'path': path, 'votes': votes, 'threads': threads, 'seconds': round(elapsed, 3),
+        'votes_per_s': round(statuses.count(200) / elapsed, 1),
+        'ok': statuses.count(200), 'failed': len(statuses) - statuses.count(200),
+        'forks': len(prev) - len(set(prev)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--votes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    results = [run(path, args.votes, args.threads, args.batch_size) for path in ('legacy', 'appender')]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Multi-booth load simulation against a running deployment. Each of K booths
+runs the browser loops from the templates concurrently (asyncio):
+
+    officer        face scan burst (3 frames, 120 ms apart; job polled every
+                   300 ms when queued), manual override when the scan does
+                   not match, then the next voter once the vote is in
+    ballot machine /api/poll_ballot long-poll (wait=25), think time, cast vote
+    receipt        /api/poll_receipt long-poll (wait=25)
+
+plus D dashboards on their polling fallback: results every 2 s
+(/api/live_stats) and the admin dashboard every 3 s (live stats + activity
+feed). At the end the whole ledger is re-verified (/api/verify_chain?full=1,
+as the ECI login), which catches forked or broken hash links left by
+concurrent casts.
+
+    flask --app app generate-election --voters 50000 --votes 0 --prefix SIM
+    flask --app app run --with-threads            # or gunicorn 'app:create_app()'
+    python benchmarks/simulate_booths.py --url http://127.0.0.1:5000 --booths 50 --duration 120 --prefix SIM
+
+Voter ids are PREFIX000000000, PREFIX000000001, ... (synthetic.py's
+numbering); voters that already voted show up in the 403 rate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+BURST_FRAMES, BURST_GAP = 3, 0.120   # voter_face_scan.html
+SCAN_JOB_POLL = 0.300                # voter_face_scan.html
+LONG_POLL_WAIT = 25                  # ballot_machine.html / receipt.html
+BALLOT_BACKOFF, RECEIPT_BACKOFF = 1.5, 2.0
+RESULTS_POLL, ADMIN_POLL = 2.0, 3.0  # result.html / admin_dashboard.html fallback polling
+
+class Client:
+    """Minimal HTTP/1.1 client on asyncio streams: one connection per request, cancellable mid-poll."""
+
+    def __init__(self, url, stats):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.stats = stats
+        self.cookie = None
+
+    async def request(self, method, path, body=b'', content_type=None, label=None):
+        label = label or path.split('?')[0]
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: close',
+                    f'Content-Length: {len(body)}']
+            if content_type:
+                head.append(f'Content-Type: {content_type}')
+            if self.cookie:
+                head.append(f'Cookie: {self.cookie}')
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+        except (OSError, asyncio.IncompleteReadError):
+            self.stats.record(label, None, time.perf_counter() - started)
+            return None, None
+        header, _, payload = raw.partition(b'\r\n\r\n')
+        status = int(header.split(b' ', 2)[1]) if header.startswith(b'HTTP/') else None
+        for line in header.split(b'\r\n')[1:]:
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'set-cookie':
+                self.cookie = value.strip().split(';', 1)[0]
+        self.stats.record(label, status, time.perf_counter() - started)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def get(self, path, label=None):
+        return self.request('GET', path, label=label)
+
+    def post_json(self, path, data):
+        return self.request('POST', path, json.dumps(data).encode(), 'application/json')
+
+    def post_urlencoded(self, path, fields):
+        return self.request('POST', path, urlencode(fields).encode(), 'application/x-www-form-urlencoded')
+
+    def post_form(self, path, fields, files):
+        boundary = uuid.uuid4().hex
+        parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode() for k, v in fields]
+        parts += [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"; filename="{name}"\r\n'
+                  f'Content-Type: image/jpeg\r\n\r\n'.encode() + data + b'\r\n' for k, name, data in files]
+        return self.request('POST', path, b''.join(parts) + f'--{boundary}--\r\n'.encode(),
+                            f'multipart/form-data; boundary={boundary}')
+
+class Stats:
+    def __init__(self):
+        self.latency = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.counts = defaultdict(int)
+        self.vote_times = []
+
+    def record(self, label, status, seconds):
+        self.latency[label].append(seconds)
+        self.status[label][status if status is not None else 'conn_error'] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for label, times in sorted(self.latency.items()):
+            ms = np.asarray(times) * 1000
+            codes = self.status[label]
+            errors = sum(n for code, n in codes.items() if code == 'conn_error' or code >= 500)
+            endpoints[label] = {'requests': len(times), 'error_rate': round(errors / len(times), 4),
+                                'status': {str(k): v for k, v in sorted(codes.items(), key=str)},
+                                'p50_ms': round(float(np.percentile(ms, 50)), 1),
+                                'p95_ms': round(float(np.percentile(ms, 95)), 1)}
+        total = sum(len(t) for label, t in self.latency.items() if not label.startswith('/api/poll_'))
+        failed = sum(n for label, codes in self.status.items() for code, n in codes.items()
+                     if code == 'conn_error' or code >= 500)
+        casts = self.status['/api/cast_vote']
+        # Sustained rate: votes over the span from the first to the last committed vote
+        span = self.vote_times[-1] - self.vote_times[0] if len(self.vote_times) > 1 else elapsed
+        return {
+            'seconds': round(elapsed, 1), 'votes_ok': casts[200],
+            'votes_per_minute': round(60 * max(len(self.vote_times) - 1, 0) / span, 1) if span else None,
+            'cast_403_rate': round(casts[403] / max(sum(casts.values()), 1), 4),
+            'error_rate': round(failed / max(sum(len(t) for t in self.latency.values()), 1), 4),
+            'face_matched': self.counts['face_matched'], 'manual_overrides': self.counts['manual_override'],
+            'receipts_seen': self.counts['receipts'], 'requests_excluding_long_polls': total,
+            'endpoints': endpoints,
+        }
+
+class Booth:
+    def __init__(self, number, voters, client, stats, args, stop):
+        self.number, self.voters, self.client, self.stats, self.args, self.stop = number, voters, client, stats, args, stop
+        self.roll = set(voters)
+        self.cast_done = asyncio.Queue()
+        self.random = random.Random(f'{args.seed}:{number}')
+
+    async def officer(self, frames):
+        for voter_id in self.voters:
+            if self.stop.is_set():
+                return
+            await asyncio.sleep(BURST_GAP * (BURST_FRAMES - 1)) # capturing the burst
+            status, j = await self.client.post_form('/api/face_scan', [('booth_number', self.number)],
+                                                     [('face', f'capture_{i}.jpg', f) for i, f in enumerate(frames)])
+            while status == 202 and j and j.get('job_id'):
+                await asyncio.sleep(SCAN_JOB_POLL)
+                status, j = await self.client.get(f"/api/face_scan/{j['job_id']}", label='/api/face_scan/<job_id>')
+            if j and j.get('activate'):
+                self.stats.counts['face_matched'] += 1
+            else:
+                # No (or the wrong) face on file: the booth officer activates the ballot by hand
+                self.stats.counts['manual_override'] += 1
+                status, _ = await self.client.post_json('/api/manual_override', {'voter_id': voter_id, 'booth_number': self.number})
+                if status != 200:
+                    continue
+            try:
+                await asyncio.wait_for(self.cast_done.get(), timeout=LONG_POLL_WAIT + self.args.think + 10)
+            except asyncio.TimeoutError:
+                self.stats.counts['ballot_timeout'] += 1
+            await asyncio.sleep(self.args.gap)
+
+    async def ballot_machine(self):
+        active = None
+        while not self.stop.is_set():
+            status, data = await self.client.get(f'/api/poll_ballot/{self.number}?wait={LONG_POLL_WAIT}&voter={active or ""}')
+            if status != 200 or data is None:
+                await asyncio.sleep(BALLOT_BACKOFF)
+                continue
+            voter_id = data.get('voter_id') if data.get('active') else None
+            if voter_id == active or voter_id not in self.roll:
+                # Nothing new, or a ballot some earlier run left open: only this run's voters vote
+                active = voter_id
+                continue
+            active = voter_id
+            await asyncio.sleep(self.random.uniform(0.5, 1.5) * self.args.think)
+            candidates = data.get('candidates') or [{'candidate_id': 'C1'}]
+            status, _ = await self.client.post_json('/api/cast_vote', {
+                'voter_id': voter_id, 'candidate_id': self.random.choice(candidates)['candidate_id'], 'booth_number': self.number})
+            if status == 200:
+                self.stats.vote_times.append(time.perf_counter())
+                active = None
+            self.cast_done.put_nowait(status)
+
+    async def receipt_printer(self):
+        last, primed = None, False # the first answer is whatever was printed before the run
+        while not self.stop.is_set():
+            status, j = await self.client.get(f'/api/poll_receipt/{self.number}?wait={LONG_POLL_WAIT}&since={last or ""}')
+            if status != 200 or j is None:
+                await asyncio.sleep(RECEIPT_BACKOFF)
+                continue
+            if j.get('has') and j['receipt'] != last:
+                self.stats.counts['receipts'] += primed
+                last = j['receipt']
+            primed = True
+
+async def dashboard(client, stop, admin):
+    while not stop.is_set():
+        await client.get('/api/live_stats')
+        if admin:
+            await client.get('/api/activity_feed')
+        await asyncio.sleep(ADMIN_POLL if admin else RESULTS_POLL)
+
+async def simulate(args):
+    stats = Stats()
+    client = Client(args.url, stats)
+    stop = asyncio.Event()
+    if args.image:
+        with open(args.image, 'rb') as fh:
+            frame = fh.read()
+        frames = [frame] * BURST_FRAMES
+    else:
+        frames = [os.urandom(2048) for _ in range(BURST_FRAMES)] # undecodable: every scan falls back to override
+
+    voter_ids = [f'{args.prefix}{i:09d}' for i in range(args.first, args.first + args.voters)]
+    booths = [Booth(f'{args.booth_prefix}{b + 1}', voter_ids[b::args.booths], client, stats, args, stop)
+              for b in range(args.booths)]
+    started = time.perf_counter()
+    background = [asyncio.create_task(b.ballot_machine()) for b in booths] + \
+                 [asyncio.create_task(b.receipt_printer()) for b in booths] + \
+                 [asyncio.create_task(dashboard(client, stop, admin=i % 2 == 0)) for i in range(args.dashboards)]
+    officers = asyncio.gather(*(b.officer(frames) for b in booths))
+    try:
+        await asyncio.wait_for(officers, timeout=args.duration)
+    except asyncio.TimeoutError:
+        pass
+    stop.set()
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.5) # let casts already sent finish
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+
+    report = stats.report(elapsed)
+    # A full re-verify is for officials only: log in as ECI first
+    official = Client(args.url, Stats())
+    await official.post_urlencoded('/eci_login', {'username': args.eci_user, 'password': args.eci_password})
+    status, chain = await official.get('/api/verify_chain?full=1')
+    report['integrity'] = {'is_valid': bool(chain and chain.get('is_valid')), 'http_status': status,
+                           'message': chain.get('message') if chain else None,
+                           'broken': chain.get('broken') if chain else None,
+                           'chain_length': chain.get('chain_length') if chain else None}
+    report['config'] = {'booths': args.booths, 'dashboards': args.dashboards, 'voters': args.voters,
+                        'think_seconds': args.think, 'gap_seconds': args.gap, 'duration': args.duration, 'url': args.url}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--booths', type=int, default=10)
+    parser.add_argument('--booth-prefix', default='SIM-B', help='Booth numbers are PREFIX1..PREFIXK.')
+    parser.add_argument('--dashboards', type=int, default=2, help='Open results/admin dashboards (polling fallback).')
+    parser.add_argument('--prefix', default='SYN', help='Voter id prefix of the generated roll.')
+    parser.add_argument('--first', type=int, default=0, help='Index of the first voter to use.')
+    parser.add_argument('--voters', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run (or until voters run out).')
+    parser.add_argument('--think', type=float, default=3.0, help='Mean seconds a voter spends at the ballot.')
+    parser.add_argument('--gap', type=float, default=1.0, help='Seconds between one voter leaving and the next scan.')
+    parser.add_argument('--image', help='Face photo sent as every scan frame.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--eci-user', default='eci', help='ECI login for the final full chain verification.')
+    parser.add_argument('--eci-password', default='eci123')
+    parser.add_argument('--out', help='Write the JSON report here as well.')
+    args = parser.parse_args()
+
+    report = asyncio.run(simulate(args))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+if __name__ == '__main__':
+    main()
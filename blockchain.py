@@ -3,6 +3,10 @@ import json
 from datetime import datetime
 
 class BlockchainUtils:
+    # Votes cast before the single-writer appender were hashed before their id
+    # was known, with this placeholder as the block index
+    LEGACY_INDEX = "PENDING"
+
     @staticmethod
     def calculate_hash(index, previous_hash, candidate_id, timestamp, nonce):
         """
@@ -21,33 +25,45 @@ class BlockchainUtils:
         return hashlib.sha256(raw.encode()).hexdigest()
 
     @staticmethod
-    def verify_chain(votes):
+    def verify_block(current, previous=None):
         """
-        Iterates through vote records to verify integrity.
-        Returns (True, "Valid") or (False, "Error Message").
+        Checks one block against its predecessor (skipped when None).
+        Returns an error message, or None if the block is intact.
         """
-        if not votes:
-            return True, "Chain Empty"
+        # 1. Check if previous_hash matches the previous block's hash
+        if previous is not None and current.previous_hash != previous.block_hash:
+            return f"Broken Link at Block {current.id}: Previous hash mismatch."
 
-        for i in range(1, len(votes)):
-            current = votes[i]
-            previous = votes[i-1]
-
-            # 1. Check if previous_hash matches the previous block's hash
-            if current.previous_hash != previous.block_hash:
-                return False, f"Broken Link at Block {current.id}: Previous hash mismatch."
-
-            # 2. Re-calculate hash to check for data tampering
-            # Note: We reconstruct the hash using the stored data
+        # 2. Re-calculate hash to check for data tampering
+        # Note: We reconstruct the hash using the stored data
+        for index in (current.id, BlockchainUtils.LEGACY_INDEX):
             recalc_hash = BlockchainUtils.calculate_hash(
-                current.id,
+                index,
                 current.previous_hash,
                 current.candidate_id,
                 current.timestamp,
                 current.nonce
             )
-            
-            if current.block_hash != recalc_hash:
-                return False, f"Data Tampering detected at Block {current.id}"
+            if current.block_hash == recalc_hash:
+                return None
+        return f"Data Tampering detected at Block {current.id}"
 
-        return True, "Blockchain Integrity Verified. No tampering detected." 
+    @staticmethod
+    def verify_chain(votes, previous=None):
+        """
+        Iterates through vote records (any iterable, in id order) to verify
+        integrity. `previous` is the already-trusted block the first record
+        should link to, if any.
+        Returns (True, "Valid") or (False, "Error Message").
+        """
+        empty = True
+        for current in votes:
+            empty = False
+            error = BlockchainUtils.verify_block(current, previous)
+            if error:
+                return False, error
+            previous = current
+
+        if empty:
+            return True, "Chain Empty"
+        return True, "Blockchain Integrity Verified. No tampering detected."
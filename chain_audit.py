@@ -0,0 +1,223 @@
+import hmac
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+from flask import current_app
+
+from models import db, Vote, ChainCheckpoint
+from blockchain import BlockchainUtils
+
+# Only the columns a block hash covers; rows are never loaded as ORM objects
+BLOCK_COLUMNS = (Vote.id, Vote.previous_hash, Vote.block_hash, Vote.candidate_id, Vote.timestamp, Vote.nonce)
+Block = namedtuple('Block', 'id previous_hash block_hash candidate_id timestamp nonce')
+CHECKPOINTS_KEPT = 10 # latest_checkpoint never looks further back
+_audit_lock = threading.Lock() # one full audit (and its process pool) per process at a time
+
+class AuditBusy(Exception):
+    """Raised when a full audit is already running in this process."""
+
+def sign_checkpoint(block_id, block_hash):
+    key = current_app.config['SECRET_KEY'].encode('utf-8')
+    return hmac.new(key, f"{block_id}:{block_hash}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+def iter_blocks(after_id=0, until_id=None, page_size=5000):
+    """Yields blocks with after_id < id (<= until_id), one keyset page in memory at a time."""
+    while True:
+        query = db.session.query(*BLOCK_COLUMNS).filter(Vote.id > after_id)
+        if until_id is not None:
+            query = query.filter(Vote.id <= until_id)
+        rows = query.order_by(Vote.id.asc()).limit(page_size).all()
+        if not rows:
+            return
+        yield from rows
+        after_id = rows[-1].id
+
+# ---------------- Full Audit (process pool) ----------------
+def _check_segment(blocks):
+    """
+    Worker side: re-hash a run of consecutive blocks and check the links
+    inside it. Returns every error found, not only the first.
+    """
+    errors, previous = [], None
+    for block in blocks:
+        error = BlockchainUtils.verify_block(block, previous)
+        if error:
+            errors.append((block.id, error))
+            if previous is not None and block.previous_hash != previous.block_hash:
+                # A broken link hides the hash check; report that separately
+                error = BlockchainUtils.verify_block(block)
+                if error:
+                    errors.append((block.id, error))
+        previous = block
+    return errors
+
+def iter_segments(segment_size):
+    segment = []
+    for row in iter_blocks(page_size=segment_size):
+        segment.append(Block(*row))
+        if len(segment) == segment_size:
+            yield segment
+            segment = []
+    if segment:
+        yield segment
+
+def audit_chain(workers=None, segment_size=None):
+    """
+    Full audit from the first block. Segments of consecutive blocks are read
+    in keyset pages and re-hashed in parallel by a process pool, while links
+    across segment boundaries are checked here as results come back in order.
+    At most two segments per worker are in flight, so memory stays flat
+    however long the chain is. Returns a report listing every broken block;
+    raises AuditBusy while another full audit runs in this process.
+    """
+    if not _audit_lock.acquire(blocking=False):
+        raise AuditBusy()
+    try:
+        return _audit_chain(workers, segment_size)
+    finally:
+        _audit_lock.release()
+
+def _audit_chain(workers, segment_size):
+    workers = workers or current_app.config['CHAIN_AUDIT_WORKERS'] or os.cpu_count() or 1
+    segment_size = segment_size or current_app.config['CHAIN_AUDIT_SEGMENT_SIZE']
+    started = time.perf_counter()
+    broken, checked, segments, last = [], 0, 0, None
+
+    def collect(segment, errors):
+        nonlocal checked, segments, last
+        head = segment[0]
+        if last is not None and head.previous_hash != last.block_hash:
+            broken.append({'block': head.id, 'error': f"Broken Link at Block {head.id}: Previous hash mismatch."})
+        broken.extend({'block': block_id, 'error': error} for block_id, error in errors)
+        checked += len(segment)
+        segments += 1
+        last = segment[-1]
+
+    segments_iter = iter_segments(segment_size)
+    head = list(islice(segments_iter, 2))
+    if workers == 1 or len(head) < 2:
+        # A single segment is not worth starting a pool for
+        for segment in chain(head, segments_iter):
+            collect(segment, _check_segment(segment))
+    else:
+        # spawn: never fork a process that holds DB connections and threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            pending = deque()
+            for segment in chain(head, segments_iter):
+                pending.append((segment, pool.submit(_check_segment, segment)))
+                if len(pending) >= 2 * workers:
+                    segment, future = pending.popleft()
+                    collect(segment, future.result())
+            while pending:
+                segment, future = pending.popleft()
+                collect(segment, future.result())
+
+    return {
+        'is_valid': not broken,
+        'broken': broken,
+        'blocks_checked': checked,
+        'segments': segments,
+        'workers': workers,
+        'seconds': round(time.perf_counter() - started, 3),
+        'last': last,
+    }
+
+# ---------------- Checkpointed Verification ----------------
+def latest_checkpoint():
+    """Newest checkpoint whose signature checks out, or None."""
+    for checkpoint in ChainCheckpoint.query.order_by(ChainCheckpoint.block_id.desc(), ChainCheckpoint.id.desc()).limit(CHECKPOINTS_KEPT):
+        if hmac.compare_digest(checkpoint.signature, sign_checkpoint(checkpoint.block_id, checkpoint.block_hash)):
+            return checkpoint
+    return None
+
+def record_checkpoint(block, full=False):
+    """Sign a checkpoint at `block` and keep only the newest CHECKPOINTS_KEPT."""
+    db.session.add(ChainCheckpoint(
+        block_id=block.id, block_hash=block.block_hash, full=full,
+        signature=sign_checkpoint(block.id, block.block_hash)
+    ))
+    db.session.flush()
+    # Oldest id still kept; a plain comparison, since MySQL rejects LIMIT inside IN (...)
+    cutoff = db.session.query(ChainCheckpoint.id).order_by(ChainCheckpoint.id.desc()) \
+        .offset(CHECKPOINTS_KEPT - 1).limit(1).scalar()
+    if cutoff is not None:
+        ChainCheckpoint.query.filter(ChainCheckpoint.id < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+
+def verify_chain(full=False, workers=None, record=False, max_blocks=None):
+    """
+    Verifies the vote chain. Routine runs start from the latest signed
+    checkpoint (or the first block when there is none) and hash only the
+    blocks appended since, at most `max_blocks` of them ('complete' is False
+    when more remain); `full` re-verifies everything through audit_chain. Only callers that pass `record` (the
+    vote writer and the CLI) checkpoint the verified tip, so the public
+    endpoint never writes. Returns the JSON payload for /api/verify_chain.
+    """
+    page_size = current_app.config['CHAIN_VERIFY_PAGE_SIZE']
+    checkpoint = None if full else latest_checkpoint()
+    anchor = None
+    if checkpoint:
+        anchor = db.session.query(*BLOCK_COLUMNS).filter(Vote.id == checkpoint.block_id).first()
+        # The anchor itself is re-hashed: its row could be edited without touching block_hash
+        if anchor is None or anchor.block_hash != checkpoint.block_hash or BlockchainUtils.verify_block(anchor):
+            return {
+                "is_valid": False, "mode": "incremental", "verified_from": checkpoint.block_id,
+                "blocks_checked": 0, "chain_length": Vote.query.count(), "last_block_hash": "None",
+                "message": f"Block {checkpoint.block_id} changed after it was checkpointed. Run a full verification."
+            }
+
+    broken, complete = [], True
+    if full:
+        audit = audit_chain(workers)
+        valid, checked, last, broken = audit['is_valid'], audit['blocks_checked'], audit['last'], audit['broken']
+        if not checked:
+            msg = "Chain Empty"
+        elif valid:
+            msg = "Blockchain Integrity Verified. No tampering detected."
+        else:
+            msg = broken[0]['error'] + (f" ({len(broken)} problems found)" if len(broken) > 1 else "")
+    else:
+        # Keep the last block seen so the tip can be checkpointed without a second query
+        state = {'checked': 0, 'last': anchor}
+        def tracked(blocks):
+            for block in blocks:
+                state['checked'] += 1
+                state['last'] = block
+                yield block
+
+        after_id = anchor.id if anchor else 0
+        blocks = iter_blocks(after_id, page_size=min(page_size, max_blocks) if max_blocks else page_size)
+        if max_blocks:
+            blocks = islice(blocks, max_blocks)
+        valid, msg = BlockchainUtils.verify_chain(tracked(blocks), previous=anchor)
+        checked, last = state['checked'], state['last']
+        if valid and checked == 0:
+            msg = "Blockchain Integrity Verified. No new blocks since the last checkpoint." if anchor else "Chain Empty"
+        elif valid and max_blocks and checked == max_blocks:
+            remaining = Vote.query.filter(Vote.id > last.id).count()
+            if remaining:
+                complete = False
+                msg = (f"Verified {checked} new block(s) up to block {last.id}; {remaining} more are not verified yet "
+                       f"(the vote writer checkpoints them, or run `flask verify-chain`).")
+
+    if record and valid and last is not None and (checkpoint is None or last.id > checkpoint.block_id):
+        record_checkpoint(last, full=full)
+
+    return {
+        "is_valid": valid,
+        "message": msg,
+        "mode": "full" if full else "incremental",
+        "verified_from": checkpoint.block_id if checkpoint else 0,
+        "blocks_checked": checked,
+        "complete": complete,
+        "verified_to": last.id if valid and last is not None else None,
+        "broken": broken,
+        "chain_length": Vote.query.count(),
+        "last_block_hash": last.block_hash if valid and last is not None else "None",
+    }
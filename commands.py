@@ -0,0 +1,302 @@
+import csv
+import math
+import time
+from datetime import timedelta
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import with_appcontext
+
+from models import db, Voter, FaceEmbedding, Candidate, AssemblyConstituency, Booth
+from utils import refresh_face_embedding, HAS_FR
+from ann_index import IVFIndex
+from chain_audit import verify_chain
+from epochs import seal_epochs
+from tally import rebuild_tallies
+from migrations import ensure_indexes
+from storage import storage_report
+from roll_import import RollImporter
+from synthetic import ElectionGenerator
+from face_worker import face_pool
+
+# ---------------- Face Embeddings ----------------
+@click.command('backfill-embeddings')
+@click.option('--force', is_flag=True, help='Re-encode every voter, not only missing/stale rows.')
+@click.option('--batch-size', default=100, show_default=True, help='Voters per commit.')
+@with_appcontext
+def backfill_embeddings_command(force, batch_size):
+    """Compute stored face encodings for voters enrolled before they existed."""
+    query = db.session.query(Voter).outerjoin(
+        FaceEmbedding, FaceEmbedding.voter_id == Voter.voter_id
+    ).filter(Voter.face_image.isnot(None))
+    if not force:
+        query = query.filter(
+            (FaceEmbedding.id.is_(None)) | (FaceEmbedding.source_image != Voter.face_image)
+        )
+
+    # Materialise ids first: committing mid-iteration would expire a live cursor
+    voter_ids = [vid for (vid,) in query.with_entities(Voter.id).all()]
+    click.echo(f"🧬 {len(voter_ids)} voter(s) need a face encoding")
+
+    encoded = failed = 0
+    for start in range(0, len(voter_ids), batch_size):
+        for voter in Voter.query.filter(Voter.id.in_(voter_ids[start:start + batch_size])):
+            try:
+                if refresh_face_embedding(voter, force=force) is not None:
+                    encoded += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f"   ⚠️ {voter.voter_id}: {e}")
+        db.session.commit()
+
+    click.echo(f"✅ Encoded {encoded}, skipped {failed} (no face found or file missing)")
+
+@click.command('build-face-ann')
+@click.option('--nlist', default=0, help='IVF cells (default: about sqrt(roll size)).')
+@click.option('--iters', default=10, show_default=True, help='k-means iterations.')
+@click.option('--sample-size', default=0, help='Encodings used to train the quantizer (default: 50 per cell).')
+@click.option('--chunk-size', default=50000, show_default=True, help='Encodings read per query while filling lists.')
+@with_appcontext
+def build_face_ann_command(nlist, iters, sample_size, chunk_size):
+    """(Re)build the IVF index used for whole-roll face lookups."""
+    fresh = db.session.query(FaceEmbedding.id, FaceEmbedding.voter_id, FaceEmbedding.encoding).join(
+        Voter, Voter.voter_id == FaceEmbedding.voter_id
+    ).filter(FaceEmbedding.source_image == Voter.face_image)
+
+    total = fresh.count()
+    if total == 0:
+        click.echo("⚠️ No stored face encodings; run backfill-embeddings first.")
+        return
+    nlist = nlist or max(1, int(math.sqrt(total)))
+    sample_size = sample_size or 50 * nlist
+    started = time.perf_counter()
+
+    sample = fresh.order_by(db.func.random()).limit(sample_size).all()
+    index = IVFIndex.train(np.frombuffer(b''.join(r.encoding for r in sample), dtype=np.float32).reshape(-1, 128), nlist, iters=iters)
+    click.echo(f"🧭 Trained {len(index.centroids)} cells on {len(sample)} encodings")
+
+    # Keyset pages keep memory to one chunk beyond the index itself
+    last_id = 0
+    while True:
+        rows = fresh.filter(FaceEmbedding.id > last_id).order_by(FaceEmbedding.id).limit(chunk_size).all()
+        if not rows:
+            break
+        index.add([r.voter_id for r in rows], np.frombuffer(b''.join(r.encoding for r in rows), dtype=np.float32).reshape(-1, 128))
+        last_id = rows[-1].id
+
+    path = current_app.config['FACE_ANN_PATH']
+    index.save(path)
+    click.echo(f"✅ Indexed {index.size} encodings into {path} in {time.perf_counter() - started:.1f}s")
+
+# ---------------- Electoral Roll Import ----------------
+@click.command('import-roll')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Default: from the file extension.')
+@click.option('--batch-size', default=1000, show_default=True, help='Voters per transaction.')
+@click.option('--workers', default=0, help='Face encoding processes (default: one per core).')
+@click.option('--image-root', type=click.Path(file_okay=False), help='Base directory for relative face_image paths.')
+@click.option('--no-faces', is_flag=True, help='Import voters only; encode later with backfill-embeddings.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first row.')
+@with_appcontext
+def import_roll_command(path, fmt, batch_size, workers, image_root, no_faces, restart):
+    """
+    Stream a CSV/JSONL electoral roll into the voter table.
+
+    Columns: voter_id, aadhaar, name, dob (required); father_name, gender,
+    address, assembly, part_no, serial_no, face_image (optional).
+    Progress is checkpointed to PATH.checkpoint.json after every batch and
+    invalid rows are written to PATH.rejects.jsonl.
+    """
+    faces = not no_faces
+    if faces and not HAS_FR:
+        click.echo("⚠️ face_recognition is not installed; importing without face encodings.")
+        faces = False
+    stats = RollImporter(path, batch_size=batch_size, workers=workers, faces=faces, image_root=image_root,
+                         fmt=fmt, restart=restart, echo=click.echo).run()
+    checkpoint_chain()
+    if stats['encoded']:
+        click.echo("💡 Run `flask build-face-ann` to add the new encodings to the whole-roll index.")
+
+@click.command('import-assemblies')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def import_assemblies_command(path):
+    """
+    Load the assembly -> constituency map that picks each voter's ballot.
+
+    CSV columns: assembly, constituency (required); state (optional).
+    Existing assemblies are updated in place.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as fh:
+        rows = list(csv.DictReader(fh))
+    seats = {a.assembly: a for a in AssemblyConstituency.query.all()}
+    added = updated = 0
+    for line, row in enumerate(rows, start=2):
+        assembly, constituency = (row.get('assembly') or '').strip(), (row.get('constituency') or '').strip()
+        if not (assembly and constituency):
+            raise click.ClickException(f"Line {line}: assembly and constituency are required")
+        seat = seats.get(assembly)
+        if seat is None:
+            seat = seats[assembly] = AssemblyConstituency(assembly=assembly)
+            db.session.add(seat)
+            added += 1
+        else:
+            updated += 1
+        seat.constituency, seat.state = constituency, (row.get('state') or '').strip() or seat.state
+    db.session.commit()
+    click.echo(f"✅ {added} assembly mapping(s) added, {updated} updated")
+
+    contested = {c for (c,) in db.session.query(Candidate.constituency).distinct()}
+    empty = sorted({s.constituency for s in seats.values()} - contested)
+    if empty:
+        click.echo(f"⚠️ {len(empty)} mapped constituencies have no candidates yet: {', '.join(empty[:10])}")
+    unmapped = db.session.query(Voter.assembly).filter(
+        Voter.assembly.notin_(db.session.query(AssemblyConstituency.assembly))
+    ).distinct().count()
+    if unmapped:
+        click.echo(f"⚠️ {unmapped} roll assemblies are still unmapped; their voters get no ballot")
+
+@click.command('import-booths')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def import_booths_command(path):
+    """
+    Load the polling booths and the roll part each one serves.
+
+    CSV columns: booth_number, assembly, part_no (required); state (optional,
+    defaults to the assembly's mapped state). Existing booths are updated in place.
+    A booth's face scans search its part first, widening up to FACE_SEARCH_FALLBACK.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as fh:
+        rows = list(csv.DictReader(fh))
+    booths = {b.booth_number: b for b in Booth.query.all()}
+    states = {a.assembly: a.state for a in AssemblyConstituency.query.all()}
+    added = updated = 0
+    for line, row in enumerate(rows, start=2):
+        number, assembly, part_no = ((row.get(k) or '').strip() for k in ('booth_number', 'assembly', 'part_no'))
+        if not (number and assembly and part_no):
+            raise click.ClickException(f"Line {line}: booth_number, assembly and part_no are required")
+        booth = booths.get(number)
+        if booth is None:
+            booth = booths[number] = Booth(booth_number=number)
+            db.session.add(booth)
+            added += 1
+        else:
+            updated += 1
+        booth.assembly, booth.part_no = assembly, part_no
+        booth.state = (row.get('state') or '').strip() or states.get(assembly) or booth.state
+    db.session.commit()
+    click.echo(f"✅ {added} booth(s) added, {updated} updated")
+
+    unmapped = sorted({b.assembly for b in booths.values()} - set(states))
+    if unmapped:
+        click.echo(f"⚠️ {len(unmapped)} booth assemblies have no constituency mapping: {', '.join(unmapped[:10])}")
+    if any(b.state is None for b in booths.values()):
+        click.echo("⚠️ Booths without a state skip the 'state' search level")
+
+# ---------------- Synthetic Data ----------------
+@click.command('generate-election')
+@click.option('--voters', default=100000, show_default=True)
+@click.option('--constituencies', default=50, show_default=True)
+@click.option('--booths', default=500, show_default=True)
+@click.option('--candidates', default=400, show_default=True)
+@click.option('--votes', default=60000, show_default=True, help='Ledger blocks to append (at most one per voter).')
+@click.option('--seed', default=0, show_default=True, help='Same seed, same dataset.')
+@click.option('--prefix', default='SYN', show_default=True, help='Prefix of generated ids.')
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per insert transaction.')
+@with_appcontext
+def generate_election_command(voters, constituencies, booths, candidates, votes, seed, prefix, batch_size):
+    """Generate a reproducible synthetic election for load and benchmark runs."""
+    try:
+        ElectionGenerator(voters, constituencies, booths, candidates, votes, seed=seed, prefix=prefix,
+                          batch_size=batch_size, echo=click.echo).run()
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    checkpoint_chain()
+    click.echo("💡 Run `flask build-face-ann` for whole-roll face search and `flask seal-epochs` for receipt proofs.")
+
+# ---------------- Vote Tallies ----------------
+@click.command('rebuild-tallies')
+@with_appcontext
+def rebuild_tallies_command():
+    """Recompute the live vote counters from the Vote ledger."""
+    report = verify_chain(full=True, record=True)
+    click.echo(f"{'🔗' if report['is_valid'] else '⚠️'} Chain check: {report['message']}")
+    total = rebuild_tallies()
+    click.echo(f"✅ Tallies rebuilt from {total} vote(s)")
+
+# ---------------- Chain Verification ----------------
+def checkpoint_chain():
+    """After a bulk load: hash the new blocks once here so /api/verify_chain starts from their tip."""
+    report = verify_chain(record=True)
+    click.echo(f"{'🔗' if report['is_valid'] else '⚠️'} Chain checkpoint: {report['message']}")
+
+@click.command('verify-chain')
+@click.option('--full', is_flag=True, help='Re-verify from the first block instead of the last checkpoint.')
+@click.option('--workers', default=0, help='Processes for a full audit (default: CHAIN_AUDIT_WORKERS).')
+@with_appcontext
+def verify_chain_command(full, workers):
+    """Verify the vote chain and checkpoint its tip."""
+    started = time.perf_counter()
+    report = verify_chain(full=full, workers=workers or None, record=True)
+    click.echo(f"{'🔗' if report['is_valid'] else '⚠️'} {report['message']}")
+    for problem in report['broken']:
+        click.echo(f"   ❌ Block {problem['block']}: {problem['error']}")
+    click.echo(f"   {report['mode']} run from block {report['verified_from']}: "
+               f"{report['blocks_checked']} block(s) hashed in {time.perf_counter() - started:.1f}s, "
+               f"chain length {report['chain_length']}")
+
+@click.command('seal-epochs')
+@with_appcontext
+def seal_epochs_command():
+    """Seal every due Merkle epoch of vote receipts."""
+    click.echo(f"🌳 Sealed {seal_epochs()} epoch(s)")
+
+# ---------------- Face Scan Jobs ----------------
+@click.command('prune-scan-jobs')
+@click.option('--hours', type=float, help='Keep jobs newer than this (default: FACE_JOB_RETENTION_HOURS).')
+@with_appcontext
+def prune_scan_jobs_command(hours):
+    """Delete booth face scan jobs past their retention."""
+    if hours is None:
+        hours = current_app.config['FACE_JOB_RETENTION_HOURS']
+    click.echo(f"🧹 Deleted {face_pool.prune(timedelta(hours=hours))} scan job(s) older than {hours:g}h")
+
+# ---------------- Schema ----------------
+@click.command('migrate-indexes')
+@with_appcontext
+def migrate_indexes_command():
+    """Add missing model indexes to an existing database, in place."""
+    created, skipped = ensure_indexes()
+    for name in created:
+        click.echo(f"   ➕ {name}")
+    for name, duplicates in skipped.items():
+        click.echo(f"⚠️ {name} skipped; duplicate values must be resolved first:")
+        for values, count in duplicates:
+            click.echo(f"   {', '.join(map(str, values))} ({count} rows)")
+    click.echo(f"✅ {len(created)} index(es) created, {len(skipped)} skipped")
+
+@click.command('storage-info')
+@with_appcontext
+def storage_info_command():
+    """Show the effective storage profile of each database engine."""
+    for bind, info in storage_report().items():
+        click.echo(f"🗄️ {bind}")
+        for key, value in info.items():
+            click.echo(f"   {key}: {value}")
+
+def register_commands(app):
+    app.cli.add_command(backfill_embeddings_command)
+    app.cli.add_command(build_face_ann_command)
+    app.cli.add_command(import_roll_command)
+    app.cli.add_command(import_assemblies_command)
+    app.cli.add_command(import_booths_command)
+    app.cli.add_command(generate_election_command)
+    app.cli.add_command(rebuild_tallies_command)
+    app.cli.add_command(verify_chain_command)
+    app.cli.add_command(seal_epochs_command)
+    app.cli.add_command(prune_scan_jobs_command)
+    app.cli.add_command(migrate_indexes_command)
+    app.cli.add_command(storage_info_command)
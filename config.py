@@ -26,11 +26,103 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'election_nominations.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Storage Profile (applied by storage.py to every engine)
+    # SQLite: WAL lets booth polls read while a vote commits; NORMAL is durable in WAL except on power loss
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') == '1'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) # wait for a lock instead of failing
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # Server databases (PostgreSQL/MySQL): connections per worker process
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800)) # seconds; below typical server idle cutoffs
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    # Read-only bind for dashboard/result views: a replica URL, or (SQLite) the same file opened read-only
+    READ_ROUTING = os.environ.get('READ_ROUTING', '1') == '1'
+    READ_DATABASE_URL = os.environ.get('READ_DATABASE_URL')
     
     # File Uploads
     UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max limit
 
+    # Face Matching
+    FACE_MATCH_TOLERANCE = float(os.environ.get('FACE_MATCH_TOLERANCE', 0.6))
+    # Best match must beat the runner-up by this distance, else it is flagged ambiguous
+    FACE_MATCH_MIN_MARGIN = float(os.environ.get('FACE_MATCH_MIN_MARGIN', 0.05))
+    # Widest partition searched after the booth's own part: booth | assembly | state | national
+    FACE_SEARCH_FALLBACK = os.environ.get('FACE_SEARCH_FALLBACK', 'assembly')
+    # Seconds a cached partition matrix is reused before new enrollments are reloaded
+    FACE_INDEX_TTL = int(os.environ.get('FACE_INDEX_TTL', 60))
+    # Optional IVF index for whole-roll lookups (built with `flask build-face-ann`)
+    FACE_ANN_PATH = os.environ.get('FACE_ANN_PATH') or os.path.join(basedir, 'instance', 'face_ann')
+    FACE_ANN_NPROBE = int(os.environ.get('FACE_ANN_NPROBE', 8))
+    # Refuse signups whose face already matches another enrolled voter
+    FACE_DEDUP_ON_SIGNUP = os.environ.get('FACE_DEDUP_ON_SIGNUP', '0') == '1'
+
+    # Face Encoding Worker Pool
+    FACE_SCAN_ASYNC = os.environ.get('FACE_SCAN_ASYNC', '1') == '1'
+    FACE_WORKERS = int(os.environ.get('FACE_WORKERS', 2)) # processes per web worker
+    FACE_QUEUE_SIZE = int(os.environ.get('FACE_QUEUE_SIZE', 32)) # pending scans before 503
+    FACE_JOB_TIMEOUT = int(os.environ.get('FACE_JOB_TIMEOUT', 15)) # seconds
+    FACE_JOB_RETENTION_HOURS = float(os.environ.get('FACE_JOB_RETENTION_HOURS', 24)) # finished scan jobs kept
+    # Probe frames are downscaled to this longest side before detection
+    FACE_MAX_SIDE = int(os.environ.get('FACE_MAX_SIDE', 640))
+    FACE_MAX_INPUT_PIXELS = int(os.environ.get('FACE_MAX_INPUT_PIXELS', 16_000_000))
+    FACE_MAX_FRAMES = int(os.environ.get('FACE_MAX_FRAMES', 5)) # frames accepted per scan burst
+    # Only 'cnn' (GPU dlib) detects a burst in one batched call; 'hog' detects
+    # frame by frame, so a scan costs ~FACE_MAX_FRAMES detections on the CPU
+    FACE_DETECTION_MODEL = os.environ.get('FACE_DETECTION_MODEL', 'hog')
+
+    # Live Results: seconds a results snapshot is served before the tally is rechecked
+    RESULTS_SNAPSHOT_INTERVAL = float(os.environ.get('RESULTS_SNAPSHOT_INTERVAL', 2))
+
+    # Vote Ledger Writer (group commit)
+    VOTE_BATCH_SIZE = int(os.environ.get('VOTE_BATCH_SIZE', 32)) # votes per commit at most
+    VOTE_BATCH_WAIT_MS = float(os.environ.get('VOTE_BATCH_WAIT_MS', 5)) # longest wait for a batch to fill
+    VOTE_QUEUE_SIZE = int(os.environ.get('VOTE_QUEUE_SIZE', 1000))
+    VOTE_COMMIT_TIMEOUT = float(os.environ.get('VOTE_COMMIT_TIMEOUT', 10)) # seconds a caller waits for its receipt
+
+    # Chain Verification: blocks hashed per keyset page (bounds memory, not work)
+    CHAIN_VERIFY_PAGE_SIZE = int(os.environ.get('CHAIN_VERIFY_PAGE_SIZE', 5000))
+    # Full audits re-hash segments of this many blocks across a process pool (0 workers = one per core)
+    CHAIN_AUDIT_WORKERS = int(os.environ.get('CHAIN_AUDIT_WORKERS', 0))
+    CHAIN_AUDIT_SEGMENT_SIZE = int(os.environ.get('CHAIN_AUDIT_SEGMENT_SIZE', 20000))
+    # The vote writer advances the signed checkpoint this often, hashing at most N new blocks per step
+    CHAIN_CHECKPOINT_SECONDS = float(os.environ.get('CHAIN_CHECKPOINT_SECONDS', 30))
+    CHAIN_CHECKPOINT_MAX_BLOCKS = int(os.environ.get('CHAIN_CHECKPOINT_MAX_BLOCKS', 50000))
+
+    # Receipt Merkle Epochs: sealed every N blocks, or once the oldest unsealed vote is this old
+    MERKLE_EPOCH_SIZE = int(os.environ.get('MERKLE_EPOCH_SIZE', 1024))
+    MERKLE_EPOCH_SECONDS = float(os.environ.get('MERKLE_EPOCH_SECONDS', 60))
+    RECEIPT_BATCH_MAX = int(os.environ.get('RECEIPT_BATCH_MAX', 10000)) # receipts per bulk verify request
+
+    # Server-Sent Events (needs a threaded/async server: each open stream holds a worker thread)
+    SSE_RECHECK_SECONDS = float(os.environ.get('SSE_RECHECK_SECONDS', 2)) # picks up other workers' votes
+    SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+    SSE_MAX_STREAM_SECONDS = float(os.environ.get('SSE_MAX_STREAM_SECONDS', 300)) # client reconnects with Last-Event-ID
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 2000))
+    SSE_BATCH_SIZE = int(os.environ.get('SSE_BATCH_SIZE', 200))
+    # Open streams per process; more get a 503 and the page falls back to polling. Keep it below the
+    # server's threads per process (gunicorn.conf.py) so other requests always find a free thread
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 32))
+
+    # Booth Long-Polling (ballot machine / receipt printer)
+    BOOTH_LONGPOLL_MAX = float(os.environ.get('BOOTH_LONGPOLL_MAX', 25)) # seconds a request may be held
+    BOOTH_RECHECK_SECONDS = float(os.environ.get('BOOTH_RECHECK_SECONDS', 2)) # catches other workers' events
+    BOOTH_LONGPOLL_MAX_HELD = int(os.environ.get('BOOTH_LONGPOLL_MAX_HELD', 32)) # per process; past it, 503 and the device backs off
+
+    # Ballot payloads are cleared on nomination review; the TTL covers other workers
+    BALLOT_CACHE_TTL = float(os.environ.get('BALLOT_CACHE_TTL', 30))
+
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    # Shared directory for multi-process servers: each worker writes its counters there
+    # and a scrape of any worker reports the sum of all of them
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
     # Firebase Config
     # Assumes the file 'serviceAccountKey.json' is in the root folder (same as app.py)
     FIREBASE_CREDENTIALS = os.path.join(basedir, 'firebase_credentials.json')
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Vote, MerkleEpoch
+from merkle import leaf_hash, merkle_root, inclusion_proof
+
+def _epoch_leaves(first_block_id, last_block_id):
+    """Block ids and receipt leaf hashes of an epoch, in tree order."""
+    rows = db.session.query(Vote.id, Vote.receipt).filter(
+        Vote.id >= first_block_id, Vote.id <= last_block_id
+    ).order_by(Vote.id.asc()).all()
+    return [r.id for r in rows], [leaf_hash(r.receipt or '') for r in rows]
+
+def seal_epochs():
+    """
+    Seals every epoch that is due: MERKLE_EPOCH_SIZE blocks, or fewer once
+    the oldest of them is MERKLE_EPOCH_SECONDS old. Safe to call from any
+    worker; a lost race on the epoch number just moves on. Returns the
+    number of epochs sealed.
+    """
+    size = current_app.config['MERKLE_EPOCH_SIZE']
+    max_age = timedelta(seconds=current_app.config['MERKLE_EPOCH_SECONDS'])
+    sealed = 0
+    while True:
+        last = MerkleEpoch.query.order_by(MerkleEpoch.epoch.desc()).first()
+        rows = db.session.query(Vote.id, Vote.receipt, Vote.timestamp).filter(
+            Vote.id > (last.last_block_id if last else 0)
+        ).order_by(Vote.id.asc()).limit(size).all()
+        if not rows or (len(rows) < size and datetime.utcnow() - rows[0].timestamp < max_age):
+            return sealed
+        root = merkle_root([leaf_hash(r.receipt or '') for r in rows])
+        db.session.add(MerkleEpoch(
+            epoch=last.epoch + 1 if last else 1, first_block_id=rows[0].id,
+            last_block_id=rows[-1].id, size=len(rows), root=root.hex()
+        ))
+        try:
+            db.session.commit()
+            sealed += 1
+        except IntegrityError:
+            db.session.rollback()
+
+def epoch_for_block(block_id):
+    return MerkleEpoch.query.filter(
+        MerkleEpoch.first_block_id <= block_id, MerkleEpoch.last_block_id >= block_id
+    ).first()
+
+def receipt_proof(receipt):
+    """
+    Returns (http_status, payload): the receipt's inclusion proof in its
+    epoch's Merkle tree, 202 while that epoch is still open, 404 if unknown.
+    """
+    vote = db.session.query(Vote.id).filter(Vote.receipt == receipt).first()
+    if vote is None:
+        return 404, {'status': 'error', 'message': 'Receipt not found'}
+    epoch = epoch_for_block(vote.id)
+    if epoch is None:
+        return 202, {'status': 'pending', 'block': vote.id, 'message': 'Vote recorded; its epoch is not sealed yet'}
+
+    block_ids, leaves = _epoch_leaves(epoch.first_block_id, epoch.last_block_id)
+    if len(leaves) != epoch.size:
+        return 409, {'status': 'error', 'block': vote.id, 'epoch': epoch.epoch,
+                     'message': 'Ledger rows changed after this epoch was sealed'}
+    index = block_ids.index(vote.id)
+    return 200, {
+        'status': 'ok',
+        'receipt': receipt,
+        'block': vote.id,
+        'epoch': epoch.epoch,
+        'leaf_index': index,
+        'tree_size': epoch.size,
+        'root': epoch.root,
+        'proof': [h.hex() for h in inclusion_proof(index, leaves)],
+        # What a verifier needs to recompute the root without the server
+        'hashing': 'sha256; leaf = H(0x00 || receipt utf-8), node = H(0x01 || left || right) (RFC 6962)',
+    }
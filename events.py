@@ -0,0 +1,51 @@
+import threading
+
+class EventBroker:
+    """
+    In-process wake-up hub for streaming endpoints. Publishers bump a
+    per-channel sequence number after committing; waiters block until it
+    moves or their timeout expires. It carries no payload: streams re-read
+    the database, which is also how commits made by other workers are seen.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = {}
+
+    def publish(self, channel):
+        with self._cond:
+            self._seq[channel] = self._seq.get(channel, 0) + 1
+            self._cond.notify_all()
+
+    def seq(self, channel):
+        return self._seq.get(channel, 0)
+
+    def wait(self, channel, seen, timeout):
+        """Block until `channel` moves past sequence `seen`; returns the current sequence."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq.get(channel, 0) != seen, timeout)
+            return self._seq.get(channel, 0)
+
+class HeldSlots:
+    """
+    Counts requests that hold a server thread while they wait (event streams,
+    booth long-polls), so one process can refuse new ones past a limit instead
+    of running out of threads for everything else.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self, limit):
+        with self._lock:
+            if self.active >= limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+broker = EventBroker()
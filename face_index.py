@@ -0,0 +1,198 @@
+import time
+import numpy as np
+from flask import current_app
+
+from models import db, Voter, FaceEmbedding, Booth
+from ann_index import ann_index
+
+FACE_DIM = 128
+SEARCH_LEVELS = ('booth', 'assembly', 'state', 'national')
+
+class UnknownBooth(Exception):
+    """A scan from a booth with no Booth row while FACE_SEARCH_FALLBACK is narrower than 'national'."""
+
+class FaceMatcher:
+    """
+    Holds every enrolled encoding in one contiguous float32 matrix with a
+    parallel voter-id array, so a probe is matched with a single batched
+    distance computation instead of a Python loop over voters.
+    """
+
+    def __init__(self, voter_ids, encodings):
+        self.voter_ids = np.asarray(voter_ids, dtype=object)
+        self.matrix = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, FACE_DIM)
+        # ||x||^2 is cached so each probe costs one matrix-vector product
+        self.sq_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (voter_id, encoding_bytes) rows as stored in FaceEmbedding."""
+        voter_ids, blobs = [], []
+        for voter_id, blob in rows:
+            voter_ids.append(voter_id)
+            blobs.append(blob)
+        matrix = np.frombuffer(b''.join(blobs), dtype=np.float32).reshape(-1, FACE_DIM)
+        return cls(voter_ids, matrix)
+
+    def __len__(self):
+        return len(self.voter_ids)
+
+    def distances(self, probe):
+        """Euclidean distance (same metric as face_recognition) to every row."""
+        probe = np.asarray(probe, dtype=np.float32).reshape(FACE_DIM)
+        d2 = self.sq_norms - 2.0 * (self.matrix @ probe) + float(probe @ probe)
+        return np.sqrt(np.maximum(d2, 0.0))
+
+    def match(self, probe, tolerance=0.6, min_margin=0.0):
+        """
+        Returns the best match as a dict, or None when nothing is enrolled.
+        'matched' is only True when the best distance is within tolerance;
+        'ambiguous' flags matches whose runner-up is closer than min_margin.
+        """
+        if len(self) == 0:
+            return None
+
+        dist = self.distances(probe)
+        if len(dist) > 1:
+            top2 = np.argpartition(dist, 1)[:2]
+            best, runner_up = sorted(top2, key=lambda i: dist[i])
+            runner_up_distance = float(dist[runner_up])
+        else:
+            best, runner_up_distance = 0, float('inf')
+
+        distance = float(dist[best])
+        margin = runner_up_distance - distance
+        matched = distance <= tolerance
+        return {
+            'voter_id': self.voter_ids[best],
+            'distance': distance,
+            'runner_up_distance': runner_up_distance,
+            'margin': margin,
+            'matched': matched,
+            'ambiguous': matched and margin < min_margin,
+        }
+
+
+class PartitionedFaceIndex:
+    """
+    Per-partition FaceMatchers keyed by booth (assembly + part), assembly,
+    state or the whole roll. A scan searches its booth's own part first and
+    widens level by level only up to FACE_SEARCH_FALLBACK.
+    """
+
+    def __init__(self):
+        self._cache = {} # (level, values) -> (FaceMatcher, built_at)
+
+    def _load(self, level, values):
+        query = db.session.query(FaceEmbedding.voter_id, FaceEmbedding.encoding).join(
+            Voter, Voter.voter_id == FaceEmbedding.voter_id
+        ).filter(FaceEmbedding.source_image == Voter.face_image) # skip stale encodings
+        if level == 'booth':
+            query = query.filter(Voter.assembly == values[0], Voter.part_no == values[1])
+        elif level == 'assembly':
+            query = query.filter(Voter.assembly == values[0])
+        elif level == 'state':
+            # Voters carry no state; a state is the set of assemblies its booths serve
+            assemblies = db.session.query(Booth.assembly).filter(Booth.state == values[0])
+            query = query.filter(Voter.assembly.in_(assemblies))
+        return FaceMatcher.from_rows(query)
+
+    def matcher(self, level, *values):
+        key = (level, values)
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is None or now - entry[1] > current_app.config['FACE_INDEX_TTL']:
+            entry = (self._load(level, values), now)
+            self._cache[key] = entry
+        return entry[0]
+
+    @staticmethod
+    def partitions_for(booth, fallback):
+        """Search order for a booth, cut off at the fallback level."""
+        if booth is None:
+            # Unmapped booth: only a national fallback may search, and then only the whole roll
+            if fallback == 'national':
+                return [('national', ())]
+            raise UnknownBooth(f"Booth is not registered; load it with `flask import-booths` (search fallback is {fallback!r})")
+        partitions = [
+            ('booth', (booth.assembly, booth.part_no)),
+            ('assembly', (booth.assembly,)),
+        ]
+        if booth.state:
+            partitions.append(('state', (booth.state,)))
+        partitions.append(('national', ()))
+        widest = SEARCH_LEVELS.index(fallback) if fallback in SEARCH_LEVELS else 0
+        return [p for p in partitions if SEARCH_LEVELS.index(p[0]) <= widest]
+
+    def search(self, probe, booth_number, tolerance=0.6, min_margin=0.0, fallback='booth'):
+        """
+        Returns the first match found walking outwards from the booth, with a
+        'scope' key naming the level it was found at and 'wrong_booth' set when
+        that is wider than the booth's own partition. If nothing is within
+        tolerance the closest result from the widest level is returned.
+        Raises UnknownBooth for an unregistered booth unless fallback is 'national'.
+        """
+        booth = Booth.query.filter_by(booth_number=booth_number).first()
+        partitions = self.partitions_for(booth, fallback)
+        result = None
+        for level, values in partitions:
+            match = self._match_level(probe, level, values, tolerance, min_margin)
+            if match is None:
+                continue
+            match['scope'] = level
+            match['wrong_booth'] = level != partitions[0][0]
+            result = match
+            if match['matched']:
+                break
+        return result
+
+    def _match_level(self, probe, level, values, tolerance, min_margin):
+        if level == 'national':
+            ann = ann_index.get(current_app.config['FACE_ANN_PATH'])
+            if ann is not None:
+                return self._ann_match(ann, probe, tolerance, min_margin)
+        return self.matcher(level, *values).match(probe, tolerance, min_margin)
+
+    @staticmethod
+    def _ann_match(ann, probe, tolerance, min_margin):
+        """
+        Whole-roll lookup through the IVF index. The index may still hold an
+        encoding from a voter's old photo, so the hit is re-checked against
+        the voter's current stored encoding before it counts as a match.
+        """
+        match = ann.match(probe, tolerance, min_margin, nprobe=current_app.config['FACE_ANN_NPROBE'])
+        if not match or not match['matched']:
+            return match
+        blob = db.session.query(FaceEmbedding.encoding).join(
+            Voter, Voter.voter_id == FaceEmbedding.voter_id
+        ).filter(
+            FaceEmbedding.voter_id == match['voter_id'],
+            FaceEmbedding.source_image == Voter.face_image
+        ).scalar()
+        if blob is None:
+            match['matched'] = match['ambiguous'] = False
+            return match
+        match['distance'] = float(FaceMatcher([match['voter_id']], np.frombuffer(blob, dtype=np.float32)).distances(probe)[0])
+        match['matched'] = match['distance'] <= tolerance
+        match['ambiguous'] = match['matched'] and match['margin'] < min_margin
+        return match
+
+    def find_duplicate(self, probe, voter_id, tolerance=0.6):
+        """Returns the id of another enrolled voter with this face, or None."""
+        # Keep a pending (not yet committed) enrollment out of its own search
+        with db.session.no_autoflush:
+            match = self._match_level(probe, 'national', (), tolerance, 0.0)
+        if match and match['matched'] and match['voter_id'] != voter_id:
+            return match['voter_id']
+        return None
+
+    def invalidate(self, assembly=None, part_no=None):
+        """Drop cached partitions a newly enrolled voter belongs to (all if unknown)."""
+        for key in list(self._cache):
+            level, values = key
+            if assembly is None or level in ('state', 'national') \
+                    or (level == 'assembly' and values == (assembly,)) \
+                    or (level == 'booth' and values == (assembly, part_no)):
+                self._cache.pop(key, None)
+
+face_index = PartitionedFaceIndex()
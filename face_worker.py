@@ -0,0 +1,221 @@
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from models import db, FaceScanJob
+from metrics import metrics
+
+PRUNE_EVERY_SECONDS = 3600
+
+# ---------------- Worker Process Side ----------------
+def _load_model():
+    """Pool initializer: import face_recognition (and its dlib models) once per process."""
+    import utils  # noqa: F401
+
+def _encode_job(frames, max_side, max_pixels, model):
+    """encode_best_face in a worker: (probe or None, seconds spent encoding)."""
+    from utils import encode_best_face
+    started = time.perf_counter()
+    probe = encode_best_face(frames, max_side, max_pixels, model)
+    return probe, time.perf_counter() - started
+
+def _encode_file_job(path):
+    """Encoding of an enrolled photo on disk: (bytes or None, error or None)."""
+    from utils import encode_face_from_file, encoding_to_bytes
+    try:
+        enc = encode_face_from_file(path)
+    except Exception as e:
+        return None, str(e)
+    if enc is None:
+        return None, 'no face found'
+    return encoding_to_bytes(enc), None
+
+# ---------------- Web Process Side ----------------
+class PoolBusy(Exception):
+    """Raised when the bounded job queue is full."""
+
+class FaceWorkerPool:
+    """
+    Runs face encoding in separate processes so a slow scan never holds a
+    request thread. Jobs are tracked in the face_scan_job table, so any web
+    worker can answer a status poll for a job submitted to another.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._pruned_at = None
+
+    def init_app(self, app):
+        self.app = app
+        self._slots = threading.BoundedSemaphore(app.config['FACE_QUEUE_SIZE'])
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a process that holds DB connections and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.app.config['FACE_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_load_model
+                )
+            return self._executor
+
+    def _reset_executor(self, executor=None):
+        """
+        Retires `executor` (default: the current one) and kills its processes;
+        a stuck encoding would otherwise keep its process busy for good. Its
+        unfinished jobs fail with BrokenProcessPool or are cancelled.
+        """
+        with self._lock:
+            executor = executor or self._executor
+            if executor is None:
+                return
+            if executor is self._executor:
+                self._executor = None
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def submit(self, frames, booth_number, on_result):
+        """
+        Queue an encoding of a burst of uploaded frames (bytes). `on_result(probe,
+        booth_number)` receives encode_best_face's result in an app context and
+        must return the JSON payload for the booth. Returns the job id; raises
+        PoolBusy when the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusy()
+        self._maybe_prune()
+        # Until the done callback is attached, every failure must give the slot back
+        try:
+            job = FaceScanJob(job_id=uuid.uuid4().hex, booth_number=booth_number, status='queued')
+            db.session.add(job)
+            db.session.commit()
+            job_id = job.job_id
+        except Exception:
+            db.session.rollback()
+            self._slots.release()
+            raise
+
+        args = (frames, self.app.config['FACE_MAX_SIDE'], self.app.config['FACE_MAX_INPUT_PIXELS'],
+                self.app.config['FACE_DETECTION_MODEL'])
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_encode_job, *args)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(_encode_job, *args)
+        except Exception:
+            self._slots.release()
+            self._fail_job(job_id)
+            raise
+        watchdog = threading.Timer(self.app.config['FACE_JOB_TIMEOUT'], self._watch, (job_id, future, executor))
+        watchdog.daemon = True
+        watchdog.start()
+        future.add_done_callback(lambda f: self._finish(job_id, booth_number, f, on_result, executor, watchdog))
+        return job_id
+
+    def _watch(self, job_id, future, executor):
+        """
+        Fires at FACE_JOB_TIMEOUT: a job still waiting is cancelled, one still
+        encoding takes its pool down with it so the process and slot come back.
+        """
+        if future.done():
+            return
+        with self.app.app_context():
+            try:
+                job = FaceScanJob.query.filter_by(job_id=job_id, status='queued').first()
+                if job is not None:
+                    self._expire(job)
+            except Exception:
+                db.session.rollback()
+        if not future.cancel():
+            self._reset_executor(executor)
+
+    def _finish(self, job_id, booth_number, future, on_result, executor, watchdog):
+        watchdog.cancel()
+        try:
+            with self.app.app_context():
+                job = FaceScanJob.query.filter_by(job_id=job_id).first()
+                if job is None or job.status != 'queued' or self._expire(job):
+                    # Booth was already told to rescan; never activate a ballot late
+                    return
+                try:
+                    probe, seconds = future.result()
+                    metrics.observe('face_encoding_seconds', seconds, mode='worker')
+                    result, status = on_result(probe, booth_number), 'done'
+                except BrokenProcessPool:
+                    self._reset_executor(executor)
+                    result, status = {'status': 'error', 'message': 'Face worker crashed, please rescan', 'activate': False}, 'error'
+                except Exception as e:
+                    db.session.rollback()
+                    result, status = {'status': 'error', 'message': str(e), 'activate': False}, 'error'
+                # A job already reported as timed out stays that way
+                FaceScanJob.query.filter_by(job_id=job_id, status='queued').update({
+                    'status': status, 'result': json.dumps(result), 'finished_at': datetime.utcnow()
+                })
+                db.session.commit()
+        finally:
+            self._slots.release()
+
+    def _fail_job(self, job_id):
+        """Best effort: a job that never reached the pool is closed instead of left to time out."""
+        try:
+            FaceScanJob.query.filter_by(job_id=job_id, status='queued').update({
+                'status': 'error', 'finished_at': datetime.utcnow(),
+                'result': json.dumps({'status': 'error', 'message': 'Face scanner unavailable, please rescan', 'activate': False})
+            })
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+    def prune(self, older_than):
+        """Deletes scan jobs created more than `older_than` (timedelta) ago; returns how many."""
+        cutoff = datetime.utcnow() - older_than
+        deleted = FaceScanJob.query.filter(FaceScanJob.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def _maybe_prune(self):
+        """At most hourly, drop jobs older than FACE_JOB_RETENTION_HOURS."""
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < PRUNE_EVERY_SECONDS:
+            return
+        self._pruned_at = now
+        try:
+            self.prune(timedelta(hours=self.app.config['FACE_JOB_RETENTION_HOURS']))
+        except Exception:
+            db.session.rollback()
+
+    def status(self, job_id):
+        """Returns (job_status, payload) or (None, None) for an unknown job."""
+        job = FaceScanJob.query.filter_by(job_id=job_id).first()
+        if not job:
+            return None, None
+        if job.status == 'queued' and not self._expire(job):
+            return 'queued', None
+        return job.status, json.loads(job.result)
+
+    def _expire(self, job):
+        """Marks a queued job as timed out once FACE_JOB_TIMEOUT has passed."""
+        deadline = job.created_at + timedelta(seconds=self.app.config['FACE_JOB_TIMEOUT'])
+        if datetime.utcnow() <= deadline:
+            return False
+        job.status, job.finished_at = 'timeout', datetime.utcnow()
+        job.result = json.dumps({'status': 'error', 'message': 'Face verification timed out, please rescan', 'activate': False})
+        db.session.commit()
+        return True
+
+face_pool = FaceWorkerPool()
@@ -0,0 +1,19 @@
+# Production server settings, read automatically by:  gunicorn "app:create_app()"
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Live result streams (SSE, up to SSE_MAX_STREAM_SECONDS) and booth long-polls
+# (up to BOOTH_LONGPOLL_MAX) each hold a thread while they wait, so the default
+# sync worker would serve one viewer or booth device at a time. gthread gives
+# every worker a thread pool; keep `threads` above SSE_MAX_STREAMS +
+# BOOTH_LONGPOLL_MAX_HELD so votes and face scans always find a free thread.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 100))
+
+# gthread workers heartbeat from their main loop, so a held stream is not a timeout
+timeout = 60
+graceful_timeout = 30
+# No preload: the vote writer and face encoding pool start inside each worker
+preload_app = False
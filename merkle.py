@@ -0,0 +1,65 @@
+import hashlib
+
+# RFC 6962 hashing: the prefixes keep a leaf from ever being passed off as an inner node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+def leaf_hash(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _split(n):
+    """Largest power of two smaller than n (n > 1)."""
+    k = 1
+    while k << 1 < n:
+        k <<= 1
+    return k
+
+def merkle_root(leaves):
+    """Tree hash over already leaf-hashed entries (RFC 6962 MTH)."""
+    n = len(leaves)
+    if n == 0:
+        return hashlib.sha256(b'').digest()
+    if n == 1:
+        return leaves[0]
+    k = _split(n)
+    return node_hash(merkle_root(leaves[:k]), merkle_root(leaves[k:]))
+
+def inclusion_proof(index, leaves):
+    """Audit path for leaves[index], nearest sibling first (RFC 6962 PATH)."""
+    n = len(leaves)
+    if n <= 1:
+        return []
+    k = _split(n)
+    if index < k:
+        return inclusion_proof(index, leaves[:k]) + [merkle_root(leaves[k:])]
+    return inclusion_proof(index - k, leaves[k:]) + [merkle_root(leaves[:k])]
+
+def verify_inclusion(leaf, index, size, proof, root):
+    """
+    Checks an audit path the way an observer would (RFC 9162, 2.1.3.2):
+    log2(size) hashes, no access to the other leaves. `leaf` is the raw
+    entry (the receipt); proof and root are bytes or hex strings.
+    """
+    if index >= size:
+        return False
+    proof = [bytes.fromhex(p) if isinstance(p, str) else p for p in proof]
+    root = bytes.fromhex(root) if isinstance(root, str) else root
+    fn, sn, r = index, size - 1, leaf_hash(leaf)
+    for p in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
@@ -0,0 +1,251 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+from models import db
+from tally import candidate_totals
+
+PREFIX = 'bharatvotes_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30) # long-polls hold up to 25s
+ENCODING_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint and method.', LATENCY_BUCKETS),
+    'http_requests_in_flight': ('gauge', 'HTTP requests being handled.', None),
+    'votes_committed_total': ('counter', 'Votes durably appended to the ledger.', None),
+    'votes_rejected_total': ('counter', 'Votes the ledger writer turned away, by HTTP status.', None),
+    'face_scans_total': ('counter', 'Face scan outcomes: ok, mismatch, ambiguous, error (already voted).', None),
+    'face_encoding_seconds': ('histogram', 'Time to pick and encode the best face of a scan burst.', ENCODING_BUCKETS),
+    'db_queries_total': ('counter', 'SQL statements executed.', None),
+    'db_queries_per_request': ('histogram', 'SQL statements issued by one HTTP request, by endpoint.', QUERY_BUCKETS),
+    'chain_length': ('gauge', 'Blocks in the vote ledger.', None),
+}
+GAUGES = {name for name, (kind, _, _) in METRICS.items() if kind == 'gauge'}
+
+class _Shard:
+    """One thread's counters. Only its own thread writes to it."""
+    __slots__ = ('values', 'histograms')
+
+    def __init__(self):
+        self.values = {}     # (name, labels) -> number
+        self.histograms = {} # (name, labels) -> [bucket counts, sum]
+
+def _merge(values, histograms, other_values, other_histograms):
+    for key, value in other_values.items():
+        values[key] = values.get(key, 0) + value
+    for key, (counts, total) in other_histograms.items():
+        mine = histograms.get(key)
+        if mine is None:
+            histograms[key] = [list(counts), total]
+        else:
+            mine[0] = [a + b for a, b in zip(mine[0], counts)]
+            mine[1] += total
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+class Metrics:
+    """
+    Counters and histograms for /metrics. Every thread records into its own
+    shard without taking a lock; a scrape sums the shards (folding those of
+    finished threads into one) and, with METRICS_DIR set, the snapshots the
+    other worker processes flush there every METRICS_FLUSH_SECONDS.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = [] # [(thread, shard)]
+        self._retired = _Shard()
+        self._flushed_at = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['METRICS_ENABLED']
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._on_query)
+
+    # ---------------- Recording ----------------
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) % 256 == 0:
+                    # Thread-per-request servers: don't wait for a scrape to drop dead shards
+                    self._retire_dead()
+            return shard
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        values = self._shard().values
+        key = (name, tuple(sorted(labels.items())))
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        histograms = self._shard().histograms
+        key = (name, tuple(sorted(labels.items())))
+        buckets = METRICS[name][2]
+        h = histograms.get(key)
+        if h is None:
+            h = histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+        h[0][bisect.bisect_left(buckets, value)] += 1 # last slot is +Inf
+        h[1] += value
+
+    # ---------------- Request Hooks ----------------
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_queries = 0
+        self.inc('http_requests_in_flight')
+
+    def _after_request(self, response):
+        started = g.get('_metrics_start')
+        if started is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched' # rules, not paths: bounded labels
+        self.observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        self.inc('http_requests_total', endpoint=endpoint, method=request.method, status=str(response.status_code))
+        self.observe('db_queries_per_request', g.get('_metrics_queries', 0), endpoint=endpoint)
+        if self.app.config['METRICS_DIR'] and time.monotonic() - self._flushed_at >= self.app.config['METRICS_FLUSH_SECONDS']:
+            self._flushed_at = time.monotonic()
+            self._flush()
+        return response
+
+    def _teardown_request(self, exc):
+        # Runs even when after_request did not, so the gauge never leaks
+        if g.pop('_metrics_start', None) is not None:
+            self.inc('http_requests_in_flight', -1)
+
+    def _on_query(self, conn, cursor, statement, parameters, context, executemany):
+        self.inc('db_queries_total')
+        if has_request_context() and '_metrics_queries' in g:
+            g._metrics_queries += 1
+
+    # ---------------- Aggregation ----------------
+    def _retire_dead(self):
+        """Fold shards of finished threads into one; caller holds the lock."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(self._retired.values, self._retired.histograms, shard.values, shard.histograms)
+        self._shards = live
+
+    def snapshot(self):
+        """This process's totals: ({(name, labels): value}, {(name, labels): [counts, sum]})."""
+        with self._lock:
+            self._retire_dead()
+            values, histograms = {}, {}
+            _merge(values, histograms, self._retired.values, self._retired.histograms)
+            for _, shard in self._shards:
+                # dict.copy() is atomic under the GIL; the owner may be writing meanwhile
+                _merge(values, histograms, shard.values.copy(),
+                       {k: [list(c), s] for k, (c, s) in shard.histograms.copy().items()})
+        return values, histograms
+
+    def _path(self, pid):
+        return os.path.join(self.app.config['METRICS_DIR'], f'metrics-{pid}.json')
+
+    def _flush(self):
+        values, histograms = self.snapshot()
+        path = self._path(os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'w') as fh:
+                json.dump({'values': [[n, l, v] for (n, l), v in values.items()],
+                           'histograms': [[n, l, c, s] for (n, l), (c, s) in histograms.items()]}, fh)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+
+    def collect(self):
+        """Totals over this process and, with METRICS_DIR, every other worker's last flush."""
+        values, histograms = self.snapshot()
+        if self.app.config['METRICS_DIR']:
+            for path in glob.glob(self._path('*')):
+                pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+                if not pid.isdigit() or int(pid) == os.getpid():
+                    continue
+                try:
+                    with open(path) as fh:
+                        data = json.load(fh)
+                except (OSError, ValueError):
+                    continue
+                alive = _pid_alive(int(pid))
+                # Counters of exited workers still count; their gauges no longer do
+                _merge(values, histograms,
+                       {(n, tuple(map(tuple, l))): v for n, l, v in data['values'] if alive or n not in GAUGES},
+                       {(n, tuple(map(tuple, l))): (c, s) for n, l, c, s in data['histograms']})
+        values[('chain_length', ())] = sum(candidate_totals().values()) # one vote_tally row per candidate, not a ledger scan
+        return values, histograms
+
+    def render(self):
+        values, histograms = self.collect()
+        by_name = {}
+        for (name, labels), value in values.items():
+            by_name.setdefault(name, []).append((labels, value))
+        for (name, labels), h in histograms.items():
+            by_name.setdefault(name, []).append((labels, h))
+
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            if name not in by_name:
+                continue
+            full = PREFIX + name
+            lines += [f'# HELP {full} {help_text}', f'# TYPE {full} {kind}']
+            for labels, value in sorted(by_name[name]):
+                if kind != 'histogram':
+                    lines.append(f'{full}{_labels(labels)} {_number(value)}')
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], counts):
+                    cumulative += count
+                    lines.append(f'{full}_bucket{_labels(labels + (("le", f"{bound:g}" if bound != "+Inf" else bound),))} {cumulative}')
+                lines.append(f'{full}_sum{_labels(labels)} {_number(total)}')
+                lines.append(f'{full}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return self.app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+metrics = Metrics()
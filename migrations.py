@@ -0,0 +1,40 @@
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+
+def find_duplicates(index, limit=20):
+    """Values that would violate a unique index: [(values, count)], NULLs ignored."""
+    cols = list(index.columns)
+    return [(tuple(row[:-1]), row[-1]) for row in db.session.query(*cols, db.func.count()).filter(
+        *(c.isnot(None) for c in cols)
+    ).group_by(*cols).having(db.func.count() > 1).limit(limit)]
+
+def ensure_indexes():
+    """
+    Create model indexes missing from tables that already existed
+    (db.create_all only creates indexes together with a new table); no table
+    is recreated. A unique index whose column already holds duplicates is
+    skipped rather than failing.
+    Returns (created_names, {skipped_name: duplicates}).
+    """
+    created, skipped = [], {}
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                duplicates = find_duplicates(index)
+                if duplicates:
+                    skipped[index.name] = duplicates
+                    continue
+            try:
+                index.create(db.engine, checkfirst=True)
+                created.append(index.name)
+            except IntegrityError:
+                # Duplicates written between the check and the build
+                skipped[index.name] = find_duplicates(index)
+    return created, skipped
@@ -1,8 +1,9 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
+from routing import RoutingSession
 
-db = SQLAlchemy() 
+db = SQLAlchemy(session_options={'class_': RoutingSession}) # read views may use a read-only bind
 
 # -----------------
 # Models
@@ -23,6 +24,10 @@ class DigiLockerDummy(db.Model):
 
 class Nomination(db.Model):
     __tablename__ = "nominations"
+    __table_args__ = (
+        db.Index('ix_nominations_status', 'status'),
+        db.Index('ix_nominations_created_at', 'created_at'), # ECI review list, newest first
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
     dob = db.Column(db.String(20))
@@ -51,6 +56,9 @@ class Nomination(db.Model):
     reviewed_by = db.Column(db.String(50), nullable=True)
 
 class Voter(db.Model):
+    __table_args__ = (
+        db.Index('ix_voter_assembly_part', 'assembly', 'part_no'), # face search partitions
+    )
     id = db.Column(db.Integer, primary_key=True)
     voter_id = db.Column(db.String(64), unique=True, nullable=False)
     aadhaar = db.Column(db.String(20), unique=True, nullable=False)
@@ -66,9 +74,23 @@ class Voter(db.Model):
     part_no = db.Column(db.String(50))
     serial_no = db.Column(db.String(50))
 
+    face_embedding = db.relationship('FaceEmbedding', uselist=False, backref='voter')
+
     def __repr__(self):
         return f"<Voter {self.voter_id} - {self.name}>"
 
+class FaceEmbedding(db.Model):
+    """Face encoding computed once at enrollment so scans only encode the probe."""
+    __tablename__ = "face_embedding"
+    id = db.Column(db.Integer, primary_key=True)
+    voter_id = db.Column(db.String(64), db.ForeignKey('voter.voter_id'), unique=True, nullable=False)
+    encoding = db.Column(db.LargeBinary, nullable=False) # 128 x float32
+    source_image = db.Column(db.String(256), nullable=False) # face_image the encoding was computed from
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def is_stale(self):
+        return self.voter is None or self.voter.face_image != self.source_image
+
 class Candidate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.String(64), unique=True, nullable=False)
@@ -92,16 +114,54 @@ class CandidateUser(db.Model):
         return check_password_hash(self.password, password)
 
 class Vote(db.Model):
+    __table_args__ = (
+        # One vote per voter, enforced by the database itself (NULLs are not compared)
+        db.Index('uq_vote_voter_hash', 'voter_hash', unique=True),
+        db.Index('ix_vote_booth_timestamp', 'booth_number', 'timestamp'), # receipt printer
+        db.Index('ix_vote_timestamp', 'timestamp'), # activity feed
+    )
     id = db.Column(db.Integer, primary_key=True)
     voter_hash = db.Column(db.String(64), nullable=True) 
     candidate_id = db.Column(db.String(64), nullable=False)
     booth_number = db.Column(db.String(32), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    receipt = db.Column(db.String(64))
+    receipt = db.Column(db.String(64), index=True) # receipt lookups and proofs
     previous_hash = db.Column(db.String(64), nullable=True)
     block_hash = db.Column(db.String(64), nullable=True)
     nonce = db.Column(db.Integer, default=0)
 
+class VoteTally(db.Model):
+    """Running vote counts, updated in the same transaction as each Vote insert."""
+    __tablename__ = "vote_tally"
+    __table_args__ = (
+        db.UniqueConstraint('candidate_id', 'booth_number', name='uq_vote_tally_candidate_booth'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.String(64), nullable=False)
+    booth_number = db.Column(db.String(32), nullable=False) # '*' row holds the candidate's total
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ChainCheckpoint(db.Model):
+    """A block the whole chain up to was verified at; signed so it cannot be forged in the DB."""
+    __tablename__ = "chain_checkpoint"
+    id = db.Column(db.Integer, primary_key=True)
+    block_id = db.Column(db.Integer, nullable=False)
+    block_hash = db.Column(db.String(64), nullable=False)
+    signature = db.Column(db.String(64), nullable=False) # HMAC-SHA256(SECRET_KEY, block_id:block_hash)
+    full = db.Column(db.Boolean, default=False) # set by a full re-verify from the genesis block
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class MerkleEpoch(db.Model):
+    """A sealed run of consecutive blocks and the Merkle root over their receipts."""
+    __tablename__ = "merkle_epoch"
+    id = db.Column(db.Integer, primary_key=True)
+    epoch = db.Column(db.Integer, unique=True, nullable=False)
+    first_block_id = db.Column(db.Integer, nullable=False, index=True)
+    last_block_id = db.Column(db.Integer, nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)
+    root = db.Column(db.String(64), nullable=False) # hex, RFC 6962 tree hash
+    sealed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -123,7 +183,43 @@ class BoothOfficer(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+class Booth(db.Model):
+    """Maps a polling booth to the roll partition (assembly / part) it serves."""
+    id = db.Column(db.Integer, primary_key=True)
+    booth_number = db.Column(db.String(32), unique=True, nullable=False)
+    assembly = db.Column(db.String(100), nullable=False)
+    part_no = db.Column(db.String(50), nullable=False)
+    state = db.Column(db.String(100), nullable=True)
+
+    def __repr__(self):
+        return f"<Booth {self.booth_number} - {self.assembly}/{self.part_no}>"
+
+class AssemblyConstituency(db.Model):
+    """Maps a roll assembly segment to the constituency (Candidate.constituency) whose ballot its voters get."""
+    __tablename__ = "assembly_constituency"
+    id = db.Column(db.Integer, primary_key=True)
+    assembly = db.Column(db.String(100), unique=True, nullable=False)
+    constituency = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(100), nullable=True)
+
+    def __repr__(self):
+        return f"<AssemblyConstituency {self.assembly} -> {self.constituency}>"
+
+class FaceScanJob(db.Model):
+    """An asynchronous booth face scan; result holds the JSON sent back to the booth."""
+    __tablename__ = "face_scan_job"
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(32), unique=True, nullable=False)
+    booth_number = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(20), default="queued") # queued | done | error | timeout
+    result = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 class BallotStatus(db.Model):
+    __table_args__ = (
+        db.Index('ix_ballot_status_booth_active', 'booth_number', 'is_active'), # ballot machine polls
+    )
     id = db.Column(db.Integer, primary_key=True)
     voter_id = db.Column(db.String(64), nullable=False)
     booth_number = db.Column(db.String(32), nullable=False)
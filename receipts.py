@@ -0,0 +1,44 @@
+from bisect import bisect_right
+
+from models import db, Vote, MerkleEpoch
+
+IN_CHUNK = 500 # bound parameters per IN (...) query; SQLite builds may cap at 999
+
+def _epoch_finder(block_ids):
+    """Maps block id -> sealed epoch number (or None) with one range query."""
+    if not block_ids:
+        return lambda block_id: None
+    epochs = MerkleEpoch.query.with_entities(
+        MerkleEpoch.first_block_id, MerkleEpoch.last_block_id, MerkleEpoch.epoch
+    ).filter(
+        MerkleEpoch.last_block_id >= min(block_ids), MerkleEpoch.first_block_id <= max(block_ids)
+    ).order_by(MerkleEpoch.first_block_id.asc()).all()
+    starts = [e.first_block_id for e in epochs]
+
+    def find(block_id):
+        i = bisect_right(starts, block_id) - 1
+        if i >= 0 and block_id <= epochs[i].last_block_id:
+            return epochs[i].epoch
+        return None
+    return find
+
+def lookup_receipts(receipts):
+    """
+    Returns {receipt: {'block', 'epoch', 'booth_number', 'timestamp'}} for
+    the receipts found, via the receipt index in chunked IN queries.
+    The candidate is deliberately left out: a receipt proves inclusion,
+    not how someone voted.
+    """
+    unique = list(dict.fromkeys(receipts))
+    rows = []
+    for start in range(0, len(unique), IN_CHUNK):
+        rows.extend(db.session.query(Vote.receipt, Vote.id, Vote.booth_number, Vote.timestamp).filter(
+            Vote.receipt.in_(unique[start:start + IN_CHUNK])
+        ))
+    epoch_of = _epoch_finder([r.id for r in rows])
+    return {r.receipt: {
+        'block': r.id,
+        'epoch': epoch_of(r.id),
+        'booth_number': r.booth_number,
+        'timestamp': r.timestamp.isoformat() if r.timestamp else None,
+    } for r in rows}
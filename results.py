@@ -0,0 +1,113 @@
+import json
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from models import Candidate
+from tally import candidate_totals
+
+FORCED_RECHECK_SECONDS = 0.25 # min_version can force a recheck at most this often, whatever clients send
+
+class ResultsSnapshot:
+    """
+    One shared live-results payload per process. It is rebuilt at most once
+    per RESULTS_SNAPSHOT_INTERVAL, and then only if the vote count or the
+    candidate list changed; every viewer in between gets the cached bytes.
+    The version is the total vote count and the ETag a hash of the results,
+    so both agree across workers.
+    """
+
+    def __init__(self):
+        self.body = None
+        self.etag = None
+        self.version = None
+        self._token = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, interval, min_version=0):
+        """
+        Returns (body_bytes, etag) for the current results. A client that has
+        already seen min_version votes pushed gets the tally rechecked early
+        rather than a snapshot older than that, but no more than once per
+        FORCED_RECHECK_SECONDS: min_version comes from the client unchecked.
+        """
+        if self._fresh(interval, min_version):
+            return self.body, self.etag
+        with self._lock:
+            # Another request may have refreshed while this one waited
+            if not self._fresh(interval, min_version):
+                totals = candidate_totals()
+                token = (sum(totals.values()), Candidate.query.count())
+                if token != self._token:
+                    self._rebuild(totals, token)
+                self._checked_at = time.monotonic()
+        return self.body, self.etag
+
+    def _fresh(self, interval, min_version):
+        if self.body is None:
+            return False
+        age = time.monotonic() - self._checked_at
+        return age < interval and (self.version >= min_version or age < FORCED_RECHECK_SECONDS)
+
+    def invalidate(self):
+        """Force a rebuild on the next request (e.g. after a nomination review)."""
+        self._token = None
+        self._checked_at = 0.0
+
+    def _rebuild(self, totals, token):
+        candidates = Candidate.query.all()
+        party_tally, state_tally, const_tally = {}, {}, {}
+        results_list = []
+        for c in candidates:
+            count = totals.get(c.candidate_id, 0)
+            party_tally[c.party] = party_tally.get(c.party, 0) + count
+            results_list.append({
+                'candidate_id': c.candidate_id,
+                'name': c.name,
+                'party': c.party,
+                'constituency': c.constituency,
+                'state': c.state,
+                'count': count
+            })
+
+            state = state_tally.setdefault(c.state or 'Unknown', {'state': c.state or 'Unknown', 'total': 0, 'parties': {}})
+            state['total'] += count
+            state['parties'][c.party] = state['parties'].get(c.party, 0) + count
+
+            seat = const_tally.setdefault(c.constituency, {
+                'constituency': c.constituency, 'state': c.state, 'total': 0, 'leader': None
+            })
+            seat['total'] += count
+            if count and (seat['leader'] is None or count > seat['leader']['count']):
+                seat['leader'] = {'name': c.name, 'party': c.party, 'count': count}
+
+        party_list = [{'party': k, 'count': v} for k, v in party_tally.items()]
+        party_list.sort(key=lambda x: x['count'], reverse=True)
+        results_list.sort(key=lambda x: x['count'], reverse=True)
+        states = sorted(state_tally.values(), key=lambda x: x['total'], reverse=True)
+        for state in states:
+            state['parties'] = sorted(
+                ({'party': k, 'count': v} for k, v in state['parties'].items()),
+                key=lambda x: x['count'], reverse=True
+            )
+
+        payload = {
+            'version': token[0],
+            'generated_at': datetime.utcnow().isoformat(),
+            'total_votes': token[0],
+            'candidates': results_list,
+            'parties': party_list,
+            'states': states,
+            'constituencies': sorted(const_tally.values(), key=lambda x: x['total'], reverse=True),
+        }
+        # generated_at is left out of the ETag so identical results share one
+        etag_source = json.dumps(dict(payload, generated_at=None), sort_keys=True).encode()
+        self.etag = hashlib.sha1(etag_source).hexdigest()[:20]
+        payload['etag'] = self.etag
+        self.body = json.dumps(payload).encode()
+        self.version = token[0]
+        self._token = token
+
+results_snapshot = ResultsSnapshot()
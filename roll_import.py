@@ -0,0 +1,256 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Voter, FaceEmbedding
+from face_worker import _load_model, _encode_file_job
+
+REQUIRED_FIELDS = ('voter_id', 'aadhaar', 'name', 'dob')
+OPTIONAL_FIELDS = ('father_name', 'gender', 'address', 'assembly', 'part_no', 'serial_no', 'face_image')
+DOB_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+REPORT_EVERY = 5.0 # seconds between progress lines
+
+class RollReader:
+    """
+    Streams records from a CSV (with header) or JSONL roll file. Lines are
+    pulled with readline so the file position after any batch can be saved
+    and seeked back to on resume.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.format = fmt or ('jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+        self._fh = open(path, 'r', encoding='utf-8-sig', newline='')
+        self.header = next(csv.reader([self._fh.readline()])) if self.format == 'csv' else None
+        self.rows = 0
+
+    def seek(self, position, rows):
+        self._fh.seek(position)
+        self.rows = rows
+
+    def close(self):
+        self._fh.close()
+
+    def _lines(self):
+        while True:
+            line = self._fh.readline()
+            if not line:
+                return
+            yield line
+
+    def _records(self):
+        if self.format == 'csv':
+            for values in csv.reader(self._lines()):
+                if values:
+                    yield dict(zip(self.header, values))
+            return
+        for line in self._lines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {'__error__': f'invalid JSON: {e}'}
+            yield record if isinstance(record, dict) else {'__error__': 'not a JSON object'}
+
+    def batches(self, size):
+        """Yields (batch, position, rows) where batch is [(row_number, record)]."""
+        batch = []
+        for record in self._records():
+            self.rows += 1
+            batch.append((self.rows, record))
+            if len(batch) == size:
+                yield batch, self._fh.tell(), self.rows
+                batch = []
+        if batch:
+            yield batch, self._fh.tell(), self.rows
+
+def voter_row(record, image_root=None):
+    """Validate one roll record into Voter column values; raises ValueError."""
+    if '__error__' in record:
+        raise ValueError(record['__error__'])
+    missing = [f for f in REQUIRED_FIELDS if not str(record.get(f) or '').strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    row = {f: str(record[f]).strip() for f in REQUIRED_FIELDS}
+    for fmt in DOB_FORMATS:
+        try:
+            row['dob'] = datetime.strptime(row['dob'], fmt).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"unreadable dob {row['dob']!r}")
+    for f in OPTIONAL_FIELDS:
+        value = record.get(f)
+        row[f] = str(value).strip() if value not in (None, '') else None
+    if row['face_image'] and image_root and not os.path.isabs(row['face_image']):
+        row['face_image'] = os.path.join(image_root, row['face_image'])
+    return row
+
+class RollImporter:
+    """
+    Imports a roll file into Voter (and FaceEmbedding) in batched
+    transactions. Face photos of one batch are encoded by a process pool
+    while the previous batch is being written. After every commit the file
+    position goes to a checkpoint file, so a rerun resumes where a crashed
+    import stopped; voters already on the roll are skipped, never updated.
+    """
+
+    def __init__(self, path, batch_size=1000, workers=0, faces=True, image_root=None, fmt=None,
+                 checkpoint_path=None, rejects_path=None, restart=False, echo=print):
+        self.path = os.path.abspath(path)
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.faces = faces
+        self.image_root = image_root
+        self.format = fmt
+        self.checkpoint_path = checkpoint_path or self.path + '.checkpoint.json'
+        self.rejects_path = rejects_path or self.path + '.rejects.jsonl'
+        self.restart = restart
+        self.echo = echo
+        self.stats = {'rows': 0, 'inserted': 0, 'skipped': 0, 'rejected': 0, 'encoded': 0, 'no_face': 0}
+
+    # ---------------- Checkpoint ----------------
+    def _load_checkpoint(self):
+        if self.restart or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as fh:
+            state = json.load(fh)
+        return state if state.get('source') == self.path else None
+
+    def _save_checkpoint(self, position, done=False):
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump({'source': self.path, 'position': position, 'done': done, 'stats': self.stats,
+                       'saved_at': datetime.utcnow().isoformat()}, fh)
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---------------- Import ----------------
+    def run(self):
+        state = self._load_checkpoint()
+        if state and state['done']:
+            self.echo(f"✅ {self.path} was already imported (use --restart to import again)")
+            return state['stats']
+
+        reader = RollReader(self.path, self.format)
+        if state:
+            self.stats.update(state['stats'])
+            reader.seek(state['position'], self.stats['rows'])
+            self.echo(f"↩️ Resuming after row {self.stats['rows']}")
+        pool = None
+        if self.faces:
+            # spawn: never fork a process that holds DB connections and threads
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_load_model)
+
+        started, last_report, start_rows = time.perf_counter(), time.perf_counter(), self.stats['rows']
+        position = state['position'] if state else None
+        try:
+            # One batch is encoding while the one before it is written
+            pending = deque()
+            with open(self.rejects_path, 'a', encoding='utf-8') as rejects:
+                for batch, position, rows in reader.batches(self.batch_size):
+                    pending.append(self._prepare(batch, pool) + (position, rows))
+                    if len(pending) > 1:
+                        self._write(*pending.popleft(), rejects)
+                    if time.perf_counter() - last_report >= REPORT_EVERY:
+                        last_report = time.perf_counter()
+                        self._report(start_rows, started)
+                while pending:
+                    self._write(*pending.popleft(), rejects)
+        finally:
+            reader.close()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        if position is not None:
+            self._save_checkpoint(position, done=True)
+        self._report(start_rows, started)
+        return self.stats
+
+    def _prepare(self, batch, pool):
+        """
+        Validate a batch, drop voters already enrolled and queue their photos.
+        Counts are only applied by _write, so a checkpoint never covers a
+        batch that was not committed.
+        """
+        voters, seen, rejected = [], set(), []
+        for row_number, record in batch:
+            try:
+                voters.append(voter_row(record, self.image_root))
+            except ValueError as e:
+                rejected.append(json.dumps({'row': row_number, 'error': str(e), 'record': record}, default=str))
+
+        voter_ids = [v['voter_id'] for v in voters]
+        aadhaars = [v['aadhaar'] for v in voters]
+        existing = {vid for (vid,) in db.session.query(Voter.voter_id).filter(Voter.voter_id.in_(voter_ids))} | \
+                   {a for (a,) in db.session.query(Voter.aadhaar).filter(Voter.aadhaar.in_(aadhaars))}
+        fresh = []
+        for v in voters:
+            if v['voter_id'] in existing or v['aadhaar'] in existing or v['voter_id'] in seen or v['aadhaar'] in seen:
+                continue
+            seen.update((v['voter_id'], v['aadhaar']))
+            fresh.append(v)
+
+        futures = [pool.submit(_encode_file_job, v['face_image']) if pool and v['face_image'] else None for v in fresh]
+        return fresh, futures, len(voters) - len(fresh), rejected
+
+    def _write(self, voters, futures, skipped, rejected, position, rows, rejects):
+        embeddings = []
+        for v, future in zip(voters, futures):
+            if future is None:
+                continue
+            encoding, _ = future.result()
+            if encoding is None:
+                self.stats['no_face'] += 1
+                continue
+            embeddings.append({'voter_id': v['voter_id'], 'encoding': encoding,
+                               'source_image': v['face_image'], 'updated_at': datetime.utcnow()})
+        try:
+            if voters:
+                db.session.execute(db.insert(Voter), voters)
+            if embeddings:
+                db.session.execute(db.insert(FaceEmbedding), embeddings)
+            db.session.commit()
+            inserted, encoded = len(voters), len(embeddings)
+        except IntegrityError:
+            # A voter enrolled meanwhile (or repeated in the file); retry row by row
+            db.session.rollback()
+            inserted, encoded = self._write_rows(voters, {e['voter_id']: e for e in embeddings})
+
+        for line in rejected:
+            rejects.write(line + '\n')
+        rejects.flush()
+        self.stats['inserted'] += inserted
+        self.stats['encoded'] += encoded
+        self.stats['skipped'] += skipped + len(voters) - inserted
+        self.stats['rejected'] += len(rejected)
+        self.stats['rows'] = rows
+        self._save_checkpoint(position)
+
+    def _write_rows(self, voters, embeddings):
+        inserted = encoded = 0
+        for v in voters:
+            try:
+                db.session.execute(db.insert(Voter), [v])
+                if v['voter_id'] in embeddings:
+                    db.session.execute(db.insert(FaceEmbedding), [embeddings[v['voter_id']]])
+                db.session.commit()
+                inserted += 1
+                encoded += v['voter_id'] in embeddings
+            except IntegrityError:
+                db.session.rollback()
+        return inserted, encoded
+
+    def _report(self, start_rows, started):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        s = self.stats
+        self.echo(f"📥 {s['rows']:,} rows: {s['inserted']:,} new, {s['skipped']:,} skipped, {s['rejected']:,} rejected, "
+                  f"{s['encoded']:,} faces encoded | {(s['rows'] - start_rows) / elapsed:,.0f} rows/s")
@@ -1,12 +1,13 @@
 import os
-import uuid
+import json
+import time
 import hashlib
 import random
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import (
     Blueprint, render_template, request, redirect, url_for, flash, session,
-    current_app, send_from_directory, jsonify, abort
+    current_app, send_from_directory, jsonify, abort, make_response, stream_with_context
 )
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -14,13 +15,25 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # Import models
 from models import (
     db, Voter, Candidate, Vote, Admin, BoothOfficer,
-    BallotStatus, MismatchLog, Nomination, DigiLockerDummy, CandidateUser
+    BallotStatus, MismatchLog, Nomination, DigiLockerDummy, CandidateUser, MerkleEpoch, AssemblyConstituency, Booth
 )
 
 # Import utils and Blockchain
 # Assuming these exist in your project structure based on imports
-from utils import save_face_image, encode_face_from_file, compare_faces
-from blockchain import BlockchainUtils
+from utils import save_face_image, encode_best_face, encoding_from_bytes, refresh_face_embedding
+from chain_audit import verify_chain, AuditBusy
+from epochs import receipt_proof
+from receipts import lookup_receipts
+from face_index import face_index, UnknownBooth
+from ann_index import ann_index
+from face_worker import face_pool, PoolBusy
+from results import results_snapshot
+from tally import candidate_totals
+from events import broker, HeldSlots
+from ballot_cache import ballot_cache, BallotUnavailable
+from vote_appender import vote_appender
+from routing import read_only_db
+from metrics import metrics
 
 main_bp = Blueprint('main', __name__)
 
@@ -76,8 +89,38 @@ def activate_ballot_for_voter(voter_id, booth_number='B1', note='auto'):
     bs = BallotStatus(voter_id=voter_id, booth_number=booth_number, is_active=True, timestamp=datetime.utcnow())
     db.session.add(bs)
     db.session.commit()
+    broker.publish(f'booth:{booth_number}')
     return bs
 
+longpoll_slots = HeldSlots()
+stream_slots = HeldSlots()
+
+def wait_for_booth(booth_number, changed):
+    """
+    Long-poll helper for booth devices: block until changed() is true or the
+    client's ?wait= seconds (capped at BOOTH_LONGPOLL_MAX) run out. Booth events
+    in this process wake it at once; other workers' are seen on recheck.
+    Past BOOTH_LONGPOLL_MAX_HELD held requests in this process it answers 503.
+    """
+    try: wait = min(float(request.args.get('wait', 0)), current_app.config['BOOTH_LONGPOLL_MAX'])
+    except ValueError: wait = 0
+    channel = f'booth:{booth_number}'
+    deadline = time.monotonic() + wait
+    seen = broker.seq(channel)
+    if changed(): return True
+    if wait <= 0: return False
+    if not longpoll_slots.acquire(current_app.config['BOOTH_LONGPOLL_MAX_HELD']):
+        abort(make_response(jsonify({'status': 'error', 'message': 'Server busy, please retry'}), 503, {'Retry-After': '2'}))
+    try:
+        while not changed():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: return False
+            db.session.remove() # idle waiters hold no pooled connection
+            seen = broker.wait(channel, seen, min(remaining, current_app.config['BOOTH_RECHECK_SECONDS']))
+        return True
+    finally:
+        longpoll_slots.release()
+
 # ---------------- Startup ----------------
 @main_bp.before_request
 def startup_checks():
@@ -100,44 +143,19 @@ def results_page():
     return render_template('result.html')
 
 @main_bp.route('/api/live_stats')
+@read_only_db
 def api_live_stats():
-    total_votes = Vote.query.count()
-    votes = Vote.query.all()
-    candidates = Candidate.query.all()
-    
-    candidate_tally = {c.candidate_id: 0 for c in candidates}
-    party_tally = {}
-    
-    for v in votes:
-        if v.candidate_id in candidate_tally:
-            candidate_tally[v.candidate_id] += 1
-        else:
-            # Handle votes for candidates who might have been removed or dummy IDs
-            candidate_tally[v.candidate_id] = candidate_tally.get(v.candidate_id, 0) + 1
-
-    results_list = []
-    for c in candidates:
-        count = candidate_tally.get(c.candidate_id, 0)
-        party = c.party
-        party_tally[party] = party_tally.get(party, 0) + count
-        
-        results_list.append({
-            'name': c.name,
-            'party': c.party,
-            'constituency': c.constituency,
-            'state': c.state,
-            'count': count
-        })
-        
-    party_list = [{'party': k, 'count': v} for k, v in party_tally.items()]
-    party_list.sort(key=lambda x: x['count'], reverse=True)
-    results_list.sort(key=lambda x: x['count'], reverse=True)
-
-    return jsonify({
-        'total_votes': total_votes,
-        'candidates': results_list,
-        'parties': party_list
-    })
+    # Shared snapshot built from the vote_tally counters; unchanged results cost a 304.
+    # Stream clients resyncing after a pushed event pass ?min_version=<votes seen>
+    body, etag = results_snapshot.get(current_app.config['RESULTS_SNAPSHOT_INTERVAL'],
+                                      request.args.get('min_version', 0, type=int))
+    if request.if_none_match.contains(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = current_app.response_class(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache' # browsers revalidate with If-None-Match
+    return resp
 
 # ---------------- Candidate Nomination ----------------
 @main_bp.route("/candidates", methods=["GET", "POST"])
@@ -273,6 +291,7 @@ def eci_login():
     return render_template('eci_login.html')
 
 @main_bp.route("/eci_dashboard")
+@read_only_db
 def eci_dashboard():
     if not session.get('eci'): return redirect(url_for('main.eci_login'))
     candidates = Nomination.query.order_by(Nomination.created_at.desc()).all()
@@ -306,6 +325,8 @@ def approve_candidate(id):
         db.session.add(new_c)
     
     db.session.commit()
+    results_snapshot.invalidate()
+    ballot_cache.invalidate()
     flash(f"Candidate {cand.name} approved and added to ballot.", "success")
     return redirect(url_for("main.eci_dashboard"))
 
@@ -324,6 +345,8 @@ def reject_candidate(id):
     if public_c: db.session.delete(public_c)
     
     db.session.commit()
+    results_snapshot.invalidate()
+    ballot_cache.invalidate()
     flash(f"Candidate rejected: {reason}", "warning")
     return redirect(url_for("main.eci_dashboard"))
 
@@ -347,16 +370,39 @@ def signup():
             except: face_path = None
 
         try:
+            # Demo roll details: the part a random registered booth of a mapped assembly serves,
+            # so that booth's face search finds the voter and the voter gets a ballot
+            booth = Booth.query.join(AssemblyConstituency, AssemblyConstituency.assembly == Booth.assembly) \
+                .order_by(db.func.random()).first()
             states = ["Maharashtra", "Delhi", "UP", "Karnataka", "Bihar"]
-            state = random.choice(states)
+            state = booth.state if booth and booth.state else random.choice(states)
             voter = Voter(
                 name=name, dob=datetime.strptime(dob, '%Y-%m-%d').date(), aadhaar=aadhaar, voter_id=voter_id, face_image=face_path,
                 father_name=f"Father of {name}", gender=random.choice(["Male", "Female"]),
                 address=f"House {random.randint(10, 999)}, Sector {random.randint(1, 20)}, {state}",
-                assembly=f"AC-{random.randint(1, 200)} {state}", part_no=f"Part-{random.randint(1, 50)}", serial_no=f"SL-{random.randint(1, 1200)}"
+                assembly=booth.assembly if booth else f"AC-{random.randint(1, 200)} {state}",
+                part_no=booth.part_no if booth else f"Part-{random.randint(1, 50)}", serial_no=f"SL-{random.randint(1, 1200)}"
             )
             db.session.add(voter)
+
+            # Encode once at enrollment; face scans only encode the probe image
+            try: emb = refresh_face_embedding(voter)
+            except Exception: emb = None
+
+            if emb is not None and current_app.config['FACE_DEDUP_ON_SIGNUP']:
+                dup = face_index.find_duplicate(encoding_from_bytes(emb.encoding), voter.voter_id,
+                                                tolerance=current_app.config['FACE_MATCH_TOLERANCE'])
+                if dup:
+                    db.session.rollback()
+                    flash('This face is already enrolled under another Voter ID', 'danger')
+                    return redirect(url_for('main.signup'))
+
             db.session.commit()
+            face_index.invalidate(voter.assembly, voter.part_no)
+            if emb is not None:
+                # Rebuilding with `flask build-face-ann` recovers a failed append
+                try: ann_index.insert(current_app.config['FACE_ANN_PATH'], voter.voter_id, encoding_from_bytes(emb.encoding))
+                except OSError: pass
             flash('Signup successful. Details auto-fetched.', 'success')
             return redirect(url_for('main.index'))
         except Exception as e:
@@ -438,39 +484,92 @@ def voter_face_scan_page(): return render_template('voter_face_scan.html')
 @main_bp.route('/api/face_scan', methods=['POST'])
 def api_face_scan():
     booth_number = request.form.get('booth_number') or 'B1'
-    file = request.files.get('face')
-    if not file: return jsonify({'status': 'error', 'message': 'face image required'}), 400
-    tmp_name = secure_filename(f"tmp_{uuid.uuid4().hex}.jpg")
-    upload_folder = ensure_upload_folder()
-    tmp_path = os.path.join(upload_folder, tmp_name)
-    file.save(tmp_path)
+    files = request.files.getlist('face')
+    if not files: return jsonify({'status': 'error', 'message': 'face image required'}), 400
+    if len(files) > current_app.config['FACE_MAX_FRAMES']:
+        return jsonify({'status': 'error', 'message': f"at most {current_app.config['FACE_MAX_FRAMES']} frames per scan"}), 400
+    # Frames are decoded in memory; nothing is written under static/uploads
+    frames = [f.read() for f in files]
+
+    if current_app.config['FACE_SCAN_ASYNC']:
+        # Encoding runs in the face worker pool; the booth polls /api/face_scan/<job_id>
+        try:
+            job_id = face_pool.submit(frames, booth_number, resolve_face_scan)
+        except PoolBusy:
+            return jsonify({'status': 'busy', 'message': 'Scanner busy, please retry in a moment.', 'activate': False}), 503
+        return jsonify({'status': 'queued', 'job_id': job_id, 'activate': False}), 202
+
+    probe = None
+    started = time.perf_counter()
+    try: probe = encode_best_face(frames, current_app.config['FACE_MAX_SIDE'], current_app.config['FACE_MAX_INPUT_PIXELS'],
+                                  current_app.config['FACE_DETECTION_MODEL'])
+    except: pass
+    metrics.observe('face_encoding_seconds', time.perf_counter() - started, mode='inline')
+    return jsonify(resolve_face_scan(probe, booth_number))
+
+@main_bp.route('/api/face_scan/<job_id>')
+def api_face_scan_status(job_id):
+    status, payload = face_pool.status(job_id)
+    if status is None: return jsonify({'status': 'error', 'message': 'Unknown scan job', 'activate': False}), 404
+    if status == 'queued': return jsonify({'status': 'queued', 'job_id': job_id, 'activate': False}), 202
+    return jsonify(dict(payload, job_id=job_id, job_status=status))
+
+def resolve_face_scan(probe, booth_number):
+    """
+    Match the best frame of a scan (encode_best_face result or None), activate
+    the ballot on success and return the booth's JSON payload.
+    """
+    payload = resolve_face_match(probe, booth_number)
+    metrics.inc('face_scans_total', result=payload['status'])
+    if probe is not None:
+        payload.update(frame=probe['frame'], frames=probe['frames'])
+    return payload
+
+def resolve_face_match(probe, booth_number):
     matched_voter = None
-    voters = Voter.query.all()
+    match = None
     try:
-        unknown_enc = encode_face_from_file(tmp_path)
-        if unknown_enc is not None:
-            for voter in voters:
-                if not voter.face_image: continue
-                try:
-                    known_enc = encode_face_from_file(voter.face_image)
-                    if known_enc is not None and compare_faces(known_enc, unknown_enc):
-                        matched_voter = voter
-                        break
-                except: pass
-    except: pass
-    try: os.remove(tmp_path)
+        if probe is not None:
+            # Only the booth's own roll part, widened up to FACE_SEARCH_FALLBACK
+            match = face_index.search(
+                probe['encoding'], booth_number,
+                tolerance=current_app.config['FACE_MATCH_TOLERANCE'],
+                min_margin=current_app.config['FACE_MATCH_MIN_MARGIN'],
+                fallback=current_app.config['FACE_SEARCH_FALLBACK']
+            )
+    except UnknownBooth as e:
+        return {'status': 'error', 'message': f'❌ {booth_number}: {e}', 'activate': False}
     except: pass
+    if match and match['ambiguous']:
+        # Two enrolled faces are nearly equally close: let the officer decide
+        try:
+            ml = MismatchLog(aadhaar='', voter_id=match['voter_id'], timestamp=datetime.utcnow(),
+                             note=f"FACE_AMBIGUOUS: d={match['distance']:.3f} margin={match['margin']:.3f}")
+            db.session.add(ml); db.session.commit()
+        except: pass
+        return {'status': 'ambiguous', 'message': '⚠️ Face matches more than one voter. Please verify manually.', 'activate': False}
+    if match and match['matched']:
+        matched_voter = Voter.query.filter_by(voter_id=match['voter_id']).first()
     if matched_voter:
         voter_hash = hashlib.sha256(matched_voter.voter_id.encode()).hexdigest()
         existing_vote = Vote.query.filter_by(voter_hash=voter_hash).first()
-        if existing_vote: return jsonify({'status': 'error', 'message': f'❌ ERROR: {matched_voter.name} has ALREADY VOTED.', 'activate': False})
+        if existing_vote: return {'status': 'error', 'message': f'❌ ERROR: {matched_voter.name} has ALREADY VOTED.', 'activate': False}
+        if match['wrong_booth']:
+            # Enrolled in another part of the roll: allowed by fallback, but audited
+            try:
+                ml = MismatchLog(aadhaar=matched_voter.aadhaar, voter_id=matched_voter.voter_id, timestamp=datetime.utcnow(),
+                                 note=f"WRONG_BOOTH: matched at {match['scope']} level from booth {booth_number}")
+                db.session.add(ml); db.session.commit()
+            except: pass
         activate_ballot_for_voter(matched_voter.voter_id, booth_number, note='face-verified')
-        return jsonify({'status': 'ok', 'message': f'✅ Welcome {matched_voter.name}. Ballot activated', 'activate': True})
+        tolerance = current_app.config['FACE_MATCH_TOLERANCE']
+        return {'status': 'ok', 'message': f'✅ Welcome {matched_voter.name}. Ballot activated', 'activate': True,
+                'distance': round(match['distance'], 4), 'confidence': round(max(0.0, 1 - match['distance'] / tolerance), 3)}
     try:
         ml = MismatchLog(aadhaar='', voter_id='', note='FACE_MISMATCH', timestamp=datetime.utcnow())
         db.session.add(ml); db.session.commit()
     except: pass
-    return jsonify({'status': 'mismatch', 'message': '❌ No match found.', 'activate': False})
+    return {'status': 'mismatch', 'message': '❌ No match found.', 'activate': False}
 
 @main_bp.route('/manual_override', methods=['POST'])
 def manual_override():
@@ -497,34 +596,25 @@ def ballot_machine_page(booth_number): return render_template('ballot_machine.ht
 
 @main_bp.route('/api/poll_ballot/<booth_number>')
 def api_poll_ballot(booth_number):
-    active = BallotStatus.query.filter_by(booth_number=booth_number, is_active=True).first()
+    # ?wait=N&voter=<id shown>: hold the request until the booth's active voter differs
+    known_voter = request.args.get('voter') or None
+    active = None
+    def changed():
+        nonlocal active
+        active = BallotStatus.query.filter_by(booth_number=booth_number, is_active=True).first()
+        return (active.voter_id if active else None) != known_voter
+    wait_for_booth(booth_number, changed)
     if not active: return jsonify({'active': False})
     voter = Voter.query.filter_by(voter_id=active.voter_id).first()
-    db_candidates = Candidate.query.all()
-    
-    # Generate JSON with Dynamic Logo URLs
-    cands_json = []
-    for c in db_candidates:
-        cands_json.append({
-            'candidate_id': c.candidate_id, 'name': c.name, 'party': c.party,
-            'constituency': c.constituency or "General", 'details': "Official Candidate",
-            'logo_url': f"https://ui-avatars.com/api/?name={c.party.replace(' ', '+')}&background=random&color=fff&size=128",
-            'social_link': '#'
-        })
-    
-    # Dummy Filler with Logos
-    if len(cands_json) < 20:
-        parties = ["Tech Future", "Green Earth", "Youth Voice", "Digital Front", "Urban Reform"]
-        for i in range(len(cands_json), 25):
-            p = random.choice(parties)
-            cands_json.append({
-                'candidate_id': f'DUMMY_{i}', 'name': f'Candidate {chr(65+i)}', 'party': p,
-                'constituency': 'General', 'details': 'Independent Candidate',
-                'logo_url': f"https://ui-avatars.com/api/?name={p.replace(' ', '+')}&background=random&color=fff&size=128",
-                'social_link': '#'
-            })
-
-    return jsonify({'active': True, 'voter_id': active.voter_id, 'voter_name': voter.name if voter else "Unknown", 'candidates': cands_json})
+    voter_name = voter.name if voter else "Unknown"
+    # Precomputed per assembly: its mapped constituency picks the ballot
+    try:
+        cands_json = ballot_cache.get(voter.assembly if voter else None, current_app.config['BALLOT_CACHE_TTL'])
+    except BallotUnavailable as e:
+        # No silent national ballot: the booth shows why and officials fix the roll or the mapping
+        return jsonify({'active': True, 'voter_id': active.voter_id, 'voter_name': voter_name, 'candidates': [],
+                        'status': 'error', 'message': str(e)}), 409
+    return jsonify({'active': True, 'voter_id': active.voter_id, 'voter_name': voter_name, 'candidates': cands_json})
 
 @main_bp.route('/api/cast_vote', methods=['POST'])
 def api_cast_vote():
@@ -533,30 +623,33 @@ def api_cast_vote():
     if not (voter_id and candidate_id): return jsonify({'status': 'error', 'message': 'voter_id and candidate_id required'}), 400
     bs = BallotStatus.query.filter_by(voter_id=voter_id, booth_number=booth_number, is_active=True).first()
     if not bs: return jsonify({'status': 'error', 'message': 'Ballot not active or session expired'}), 403
+    # Only a candidate on the ballot /api/poll_ballot showed this voter (same cached lookup)
+    voter = Voter.query.filter_by(voter_id=voter_id).first()
     try:
-        last_vote = Vote.query.order_by(Vote.id.desc()).first()
-        prev_hash = last_vote.block_hash if last_vote else "0" * 64
-        voter_hash_val = hashlib.sha256(voter_id.encode()).hexdigest()
-        timestamp = datetime.utcnow()
-        receipt = BlockchainUtils.generate_receipt(voter_id, candidate_id, timestamp)
-        nonce = 0; block_hash = BlockchainUtils.calculate_hash("PENDING", prev_hash, candidate_id, timestamp, nonce)
-        vote = Vote(voter_hash=voter_hash_val, candidate_id=candidate_id, booth_number=booth_number, receipt=receipt, timestamp=timestamp, previous_hash=prev_hash, block_hash=block_hash, nonce=nonce)
-        db.session.add(vote)
-        
-        # Deactivate ballot immediately
-        bs.is_active = False
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback(); return jsonify({'status': 'error', 'message': str(e)}), 500
-    return jsonify({'status': 'ok', 'message': 'Vote recorded on Blockchain', 'receipt': receipt})
+        ballot = ballot_cache.get(voter.assembly if voter else None, current_app.config['BALLOT_CACHE_TTL'])
+    except BallotUnavailable as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    if not any(c['candidate_id'] == candidate_id for c in ballot):
+        return jsonify({'status': 'error', 'message': "Candidate is not on this voter's ballot"}), 403
+    # Release this request's connection; the single ledger writer does the insert
+    db.session.remove()
+    status, payload = vote_appender.cast(voter_id, candidate_id, booth_number)
+    return jsonify(payload), status
 
 @main_bp.route('/receipt_viewer/<booth_number>')
 def receipt_page(booth_number): return render_template('receipt.html', booth_number=booth_number)
 
 @main_bp.route('/api/poll_receipt/<booth_number>')
 def api_poll_receipt(booth_number):
-    # Get the latest vote for this booth
-    vote = Vote.query.filter_by(booth_number=booth_number).order_by(Vote.timestamp.desc()).first()
+    # ?wait=N&since=<receipt shown>: hold the request until a newer receipt exists
+    since = request.args.get('since') or None
+    vote = None
+    def changed():
+        nonlocal vote
+        # Get the latest vote for this booth
+        vote = Vote.query.filter_by(booth_number=booth_number).order_by(Vote.timestamp.desc()).first()
+        return (vote.receipt if vote else None) != since
+    wait_for_booth(booth_number, changed)
     
     if not vote: 
         return jsonify({'has': False})
@@ -574,10 +667,60 @@ def api_poll_receipt(booth_number):
         'timestamp': vote.timestamp.isoformat()
     })
 @main_bp.route('/api/verify_chain')
+@read_only_db
 def api_verify_chain():
-    votes = Vote.query.order_by(Vote.id.asc()).all()
-    valid, msg = BlockchainUtils.verify_chain(votes)
-    return jsonify({"chain_length": len(votes), "is_valid": valid, "message": msg, "last_block_hash": votes[-1].block_hash if votes else "None"})
+    # Incremental from the last signed checkpoint; ?full=1 re-verifies every block
+    full = request.args.get('full') == '1'
+    if full and not session.get('eci') and session.get('role') != 'admin':
+        # A full audit occupies every core: officials only (or `flask verify-chain --full`)
+        return jsonify({'status': 'error', 'message': 'Full verification requires an ECI or admin login'}), 403
+    try:
+        # Bounded per request; a cold or far-behind checkpoint is reported as partial progress
+        return jsonify(verify_chain(full=full, max_blocks=None if full else current_app.config['CHAIN_CHECKPOINT_MAX_BLOCKS']))
+    except AuditBusy:
+        return jsonify({'status': 'error', 'message': 'A full verification is already running, please retry later'}), 429
+
+# ---------------- Receipt Lookup & Proofs (Merkle Epochs) ----------------
+@main_bp.route('/api/receipt/<receipt>')
+@read_only_db
+def api_receipt(receipt):
+    found = lookup_receipts([receipt]).get(receipt)
+    if not found:
+        return jsonify({'status': 'error', 'receipt': receipt, 'found': False, 'message': 'Receipt not found'}), 404
+    return jsonify({'status': 'ok', 'receipt': receipt, 'found': True, **found})
+
+@main_bp.route('/api/receipts/verify', methods=['POST'])
+@read_only_db
+def api_receipts_verify():
+    # Bulk audit: {"receipts": [...]} -> found / not found with block position, in request order
+    data = request.get_json(silent=True) or {}
+    receipts = data.get('receipts')
+    if not isinstance(receipts, list) or not all(isinstance(r, str) for r in receipts):
+        return jsonify({'status': 'error', 'message': 'Expected {"receipts": [<receipt>, ...]}'}), 400
+    limit = current_app.config['RECEIPT_BATCH_MAX']
+    if len(receipts) > limit:
+        return jsonify({'status': 'error', 'message': f'At most {limit} receipts per request'}), 413
+
+    found = lookup_receipts(receipts)
+    results = [{'receipt': r, 'found': r in found, **found.get(r, {})} for r in receipts]
+    hits = sum(1 for r in results if r['found'])
+    return jsonify({'status': 'ok', 'checked': len(results), 'found': hits, 'missing': len(results) - hits, 'results': results})
+
+@main_bp.route('/api/receipt_proof/<receipt>')
+def api_receipt_proof(receipt):
+    # Verifiable offline against the published epoch root in log2(epoch size) hashes
+    status, payload = receipt_proof(receipt)
+    return jsonify(payload), status
+
+@main_bp.route('/api/merkle_epochs')
+def api_merkle_epochs():
+    # Sealed epoch roots for observers to pin; ?after=<epoch> pages forward
+    epochs = MerkleEpoch.query.filter(MerkleEpoch.epoch > request.args.get('after', 0, type=int)) \
+        .order_by(MerkleEpoch.epoch.asc()).limit(500).all()
+    return jsonify([{
+        'epoch': e.epoch, 'first_block': e.first_block_id, 'last_block': e.last_block_id,
+        'size': e.size, 'root': e.root, 'sealed_at': e.sealed_at.isoformat()
+    } for e in epochs])
 
 @main_bp.route('/admin_dashboard')
 def admin_dashboard():
@@ -589,13 +732,78 @@ def booth_dashboard():
     if session.get('role') not in ['booth', 'eci']: return redirect(url_for('main.login'))
     return render_template('booth_dashboard.html')
 
+def vote_activity(v):
+    return {'type': 'vote', 'desc': f"New Vote Mined! (Hash: {v.block_hash[:8]}...)", 'time': v.timestamp.isoformat(), 'booth': v.booth_number}
+
 @main_bp.route('/api/activity_feed')
+@read_only_db
 def api_activity_feed():
     votes = Vote.query.order_by(Vote.timestamp.desc()).limit(10).all()
     activity = []
-    for v in votes: activity.append({'type': 'vote', 'desc': f"New Vote Mined! (Hash: {v.block_hash[:8]}...)", 'time': v.timestamp.isoformat()})
+    for v in votes: activity.append(vote_activity(v))
     return jsonify(activity)
 
+# ---------------- Live Event Stream (SSE) ----------------
+@main_bp.route('/api/stream/results')
+def api_stream_results():
+    """
+    Server-Sent Events: one 'votes' event per batch of newly committed votes,
+    carrying per-candidate tally deltas and the matching activity entries.
+    The event id is the last vote id, so a reconnecting EventSource resumes
+    from Last-Event-ID without missing or repeating votes. total_votes is a
+    real count (vote ids may have gaps): the tally sum, read in the same
+    transaction as the stream's start, plus each batch sent since.
+    """
+    total = sum(candidate_totals().values())
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+        # Votes the client has not seen yet are not part of its count
+        total -= Vote.query.filter(Vote.id > last_id).count()
+    except (TypeError, ValueError):
+        last_id = db.session.query(db.func.max(Vote.id)).scalar() or 0
+    cfg = current_app.config
+    db.session.remove()
+    if not stream_slots.acquire(cfg['SSE_MAX_STREAMS']):
+        # EventSource gives up on a 503; the page keeps polling /api/live_stats instead
+        return jsonify({'status': 'error', 'message': 'Too many open streams, poll /api/live_stats'}), 503
+
+    def generate():
+        nonlocal last_id, total
+        started = last_beat = time.monotonic()
+        seen = broker.seq('votes')
+        # Bare id lines keep the browser's Last-Event-ID current even when idle
+        yield f"retry: {int(cfg['SSE_RETRY_MS'])}\nid: {last_id}\n\n"
+        while time.monotonic() - started < cfg['SSE_MAX_STREAM_SECONDS']:
+            votes = Vote.query.filter(Vote.id > last_id).order_by(Vote.id.asc()).limit(cfg['SSE_BATCH_SIZE']).all()
+            if votes:
+                deltas = {}
+                for v in votes: deltas[v.candidate_id] = deltas.get(v.candidate_id, 0) + 1
+                total += len(votes)
+                data = {
+                    'total_votes': total, # votes up to and including this batch
+
+                    'deltas': deltas,
+                    'activity': [vote_activity(v) for v in reversed(votes)]
+                }
+                last_id = votes[-1].id
+                yield f"id: {last_id}\nevent: votes\ndata: {json.dumps(data)}\n\n"
+                last_beat = time.monotonic()
+            elif time.monotonic() - last_beat >= cfg['SSE_KEEPALIVE_SECONDS']:
+                yield f": keepalive\nid: {last_id}\n\n"
+                last_beat = time.monotonic()
+            # Never hold a pooled connection while idle
+            db.session.remove()
+            if not votes:
+                # Woken at once by votes committed in this process; others are seen on recheck
+                seen = broker.wait('votes', seen, cfg['SSE_RECHECK_SECONDS'])
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(stream_slots.release)
+    return response
+
 @main_bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     return send_from_directory(ensure_upload_folder(), filename)
\ No newline at end of file
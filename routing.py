@@ -0,0 +1,31 @@
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+READ_BIND = 'read' # SQLALCHEMY_BINDS key of the read-only engine
+
+def read_only_db(f):
+    """Route this view's SELECTs to the read-only engine, when one is configured."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.read_only_db = True
+        return f(*args, **kwargs)
+    return decorated
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs issued inside a @read_only_db view to the READ_BIND
+    engine. Flushes, DML and raw SQL always go to the primary, so a read
+    view that records something (e.g. a chain checkpoint) still writes to
+    the right database.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and isinstance(clause, Select) and not self._flushing \
+                and has_request_context() and g.get('read_only_db'):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -2,9 +2,12 @@ from datetime import datetime, timedelta
 import random
 from models import (
     db, Admin, BoothOfficer, Candidate, DigiLockerDummy, 
-    CandidateUser, Nomination, Voter
+    CandidateUser, Nomination, Voter, AssemblyConstituency, Booth
 )
 
+# Seats of the seeded candidates; demo voters and assembly mappings use only these
+DEMO_SEATS = ["Patna", "Gaya", "Hajipur", "Purnia", "Nalanda", "Muzaffarpur", "Darbhanga", "Siwan", "Bhagalpur", "Samastipur"]
+
 def run():
     """Seed database with initial demo data. Safe to run multiple times."""
     print("🌱 Starting Database Seeding...")
@@ -133,13 +136,13 @@ def run():
     # ---------------- 6. Dummy Voters (Moved from app.py) ----------------
     if Voter.query.count() < 10:
         print("🌱 Seeding 60 Dummy Voters...")
-        states = ["Maharashtra", "Delhi", "UP", "Karnataka", "Bihar"]
-        assemblies = ["Panvel", "Hajipur", "Chandni Chowk", "Bangalore South", "Patna"]
+        # Every demo assembly is mapped below (section 7), so each of these voters gets a ballot
+        assemblies = ["Patna", "Hajipur", "Gaya", "Nalanda", "Muzaffarpur"]
         
         for i in range(1, 61):
             vid = f"VOT{10000+i}"
             aadhaar = f"9999{10000000+i}"
-            state = random.choice(states)
+            assembly = random.choice(assemblies)
             
             # Check if exists to be safe
             if not Voter.query.filter_by(voter_id=vid).first():
@@ -150,8 +153,8 @@ def run():
                     dob=datetime(1980 + (i%20), 1, 1).date(),
                     father_name=f"Father of Voter {i}",
                     gender="Male" if i % 2 == 0 else "Female",
-                    address=f"House No {i}, Sector {i%10}, {state}",
-                    assembly=random.choice(assemblies),
+                    address=f"House No {i}, Sector {i%10}, {assembly}, Bihar",
+                    assembly=assembly,
                     part_no=f"Part-{i%5 + 1}",
                     serial_no=f"SL-{i}",
                     face_image=None 
@@ -161,6 +164,23 @@ def run():
     else:
         print("   Voters already exist.")
 
+    # ---------------- 7. Assembly -> Constituency Map ----------------
+    if AssemblyConstituency.query.count() == 0:
+        # One demo assembly segment per seeded seat, named after it; real rolls use `flask import-assemblies`
+        for seat in DEMO_SEATS:
+            db.session.add(AssemblyConstituency(assembly=seat, constituency=seat, state="Bihar"))
+        print(f"✅ {len(DEMO_SEATS)} assembly mappings created")
+    else:
+        print("   Assembly mappings already exist.")
+
+    # ---------------- 8. Polling Booths ----------------
+    if Booth.query.count() == 0:
+        # The demo officer's booth serves the first demo roll part; real rolls use `flask import-booths`
+        db.session.add(Booth(booth_number='B1', assembly=DEMO_SEATS[0], part_no='Part-1', state="Bihar"))
+        print("✅ Booth B1 created (Patna / Part-1)")
+    else:
+        print("   Booths already exist.")
+
     # ---------------- Commit ----------------
     try:
         db.session.commit()
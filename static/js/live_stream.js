@@ -0,0 +1,107 @@
+// static/js/live_stream.js
+// Subscribes to the live results stream (Server-Sent Events) and calls
+// onVotes(data) for every batch of committed votes. resync runs whenever the
+// stream (re)connects; if the browser has no EventSource or the stream drops,
+// it runs every pollMs until the stream is back.
+function subscribeLiveResults(onVotes, resync, pollMs) {
+    let pollTimer = null;
+    const startPolling = () => { if (!pollTimer) pollTimer = setInterval(resync, pollMs); };
+    const stopPolling = () => { if (pollTimer) { clearInterval(pollTimer); pollTimer = null; } };
+
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    const source = new EventSource('/api/stream/results');
+    source.addEventListener('votes', (e) => onVotes(JSON.parse(e.data)));
+    // EventSource reconnects by itself (resuming via Last-Event-ID); poll meanwhile
+    source.onopen = () => { stopPolling(); resync(); };
+    source.onerror = startPolling;
+}
+
+// Keeps a /api/live_stats payload current from the pushed deltas and calls
+// render(stats) after every change. The snapshot is fetched again only on
+// (re)connect or when an event does not continue from the local count.
+function liveTally(render) {
+    let stats = null;
+    let loading = null;
+    let queued = [];
+
+    async function load(minVersion) {
+        const response = await fetch(`/api/live_stats?min_version=${minVersion}`);
+        const data = await response.json();
+        const changed = !stats || data.etag !== stats.etag;
+        stats = data;
+        if (changed) render(stats);
+    }
+
+    function resync(minVersion) {
+        if (!loading) {
+            loading = load(minVersion || (stats ? stats.total_votes : 0))
+                .catch((err) => console.error('Error fetching results:', err))
+                .finally(() => {
+                    loading = null;
+                    const events = queued;
+                    queued = [];
+                    events.forEach(onVotes);
+                });
+        }
+        return loading;
+    }
+
+    function onVotes(data) {
+        if (loading || !stats) {
+            queued.push(data);
+            if (!loading) resync();
+            return;
+        }
+        if (data.total_votes <= stats.total_votes) return; // already in the snapshot
+        const added = Object.values(data.deltas).reduce((a, b) => a + b, 0);
+        const byId = new Map(stats.candidates.map((c) => [c.candidate_id, c]));
+        // Fell behind (or a candidate was added): fetch a snapshot that includes this event
+        if (data.total_votes - added !== stats.total_votes || Object.keys(data.deltas).some((id) => !byId.has(id))) {
+            resync(data.total_votes);
+            return;
+        }
+        for (const [id, n] of Object.entries(data.deltas)) byId.get(id).count += n;
+        stats.total_votes = stats.version = data.total_votes;
+        stats.etag = null; // no longer matches any server snapshot
+        summarizeTally(stats);
+        render(stats);
+    }
+
+    return { onVotes, resync: () => resync() };
+}
+
+// Rebuilds the party, state and constituency totals from the candidate counts
+// (the same shape results.py produces).
+function summarizeTally(stats) {
+    const byCount = (a, b) => b.count - a.count;
+    const parties = new Map();
+    const states = new Map();
+    const seats = new Map();
+    stats.candidates.sort(byCount);
+    for (const c of stats.candidates) {
+        parties.set(c.party, (parties.get(c.party) || 0) + c.count);
+
+        const stateName = c.state || 'Unknown';
+        const state = states.get(stateName) || { state: stateName, total: 0, parties: new Map() };
+        state.total += c.count;
+        state.parties.set(c.party, (state.parties.get(c.party) || 0) + c.count);
+        states.set(stateName, state);
+
+        const seat = seats.get(c.constituency) || { constituency: c.constituency, state: c.state, total: 0, leader: null };
+        seat.total += c.count;
+        if (c.count && (!seat.leader || c.count > seat.leader.count)) seat.leader = { name: c.name, party: c.party, count: c.count };
+        seats.set(c.constituency, seat);
+    }
+    const counted = (m) => Array.from(m, ([party, count]) => ({ party, count })).sort(byCount);
+    stats.parties = counted(parties);
+    stats.states = Array.from(states.values(), (s) => ({ ...s, parties: counted(s.parties) })).sort((a, b) => b.total - a.total);
+    stats.constituencies = Array.from(seats.values()).sort((a, b) => b.total - a.total);
+}
+
+// Prepends pushed activity (newest first) to a feed list, keeping the newest limit entries
+function mergeActivity(feed, activity, limit = 10) {
+    return activity.concat(feed).slice(0, limit);
+}
@@ -0,0 +1,97 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+from routing import READ_BIND
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def engine_options(uri, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI under the storage profile."""
+    if is_sqlite(uri):
+        # SQLite keeps SQLAlchemy's default pool; tuning happens per connection (see sqlite_pragmas)
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+def read_database_url(config):
+    """
+    URL of the read-only bind: READ_DATABASE_URL (a replica), else for a
+    SQLite file the same file opened with mode=ro. None disables routing.
+    """
+    if not config['READ_ROUTING']:
+        return None
+    if config.get('READ_DATABASE_URL'):
+        return config['READ_DATABASE_URL']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or url.query.get('uri'):
+        return None
+    return url.set(database=f"file:{url.database}", query={'mode': 'ro', 'uri': 'true'}).render_as_string(hide_password=False)
+
+def is_read_only(url):
+    return make_url(url).query.get('mode') == 'ro'
+
+def sqlite_pragmas(config, read_only=False):
+    """Connect hook applying the SQLite half of the profile to every new connection."""
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
+
+    def on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+            if config['SQLITE_WAL'] and not read_only:
+                # Persistent in the file; a no-op answer of 'memory' for in-memory databases
+                cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute(f"PRAGMA synchronous = {synchronous}")
+            cursor.execute(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+        finally:
+            cursor.close()
+    return on_connect
+
+def init_storage(app):
+    """
+    Call before db.init_app: fills in SQLALCHEMY_ENGINE_OPTIONS for the
+    configured database (explicitly configured options win) and adds the
+    read-only bind, if any, to SQLALCHEMY_BINDS.
+    """
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    read_url = read_database_url(app.config)
+    if read_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(READ_BIND, {'url': read_url, **engine_options(read_url, app.config)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+def attach_storage(app):
+    """Call after db.init_app: registers the SQLite connect hook on every SQLite engine."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragmas(app.config, read_only=is_read_only(engine.url)))
+
+def storage_report():
+    """Effective settings per engine, for `flask storage-info`."""
+    report = {}
+    for bind, engine in db.engines.items():
+        info = {'url': engine.url.render_as_string(hide_password=True), 'dialect': engine.dialect.name,
+                'pool': type(engine.pool).__name__}
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                for pragma in ('journal_mode', 'busy_timeout', 'synchronous', 'mmap_size'):
+                    info[pragma] = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+        else:
+            info['pool_size'] = engine.pool.size()
+        report[bind or 'default'] = info
+    return report
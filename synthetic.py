@@ -0,0 +1,168 @@
+import hashlib
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from models import db, Voter, FaceEmbedding, Candidate, Booth, Vote, AssemblyConstituency
+from blockchain import BlockchainUtils
+from tally import rebuild_tallies
+
+FACE_DIM = 128
+STATES = ['Bihar', 'Uttar Pradesh', 'Maharashtra', 'West Bengal', 'Tamil Nadu', 'Rajasthan', 'Karnataka', 'Gujarat']
+PARTIES = ['BJP', 'INC', 'RJD', 'JD(U)', 'AAP', 'SP', 'BSP', 'TMC', 'DMK', 'CPI(M)', 'Independent']
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Priya', 'Sneha',
+               'Arjun', 'Meera', 'Rahul', 'Pooja', 'Vikram', 'Neha', 'Suresh', 'Lakshmi', 'Imran', 'Fatima']
+LAST_NAMES = ['Kumar', 'Sharma', 'Singh', 'Yadav', 'Patel', 'Devi', 'Khan', 'Das', 'Reddy', 'Iyer', 'Gupta', 'Prasad']
+
+def synthetic_encodings(rng, hubs, n):
+    """Clustered float32 encodings: look-alike centres plus per-voter noise."""
+    vectors = hubs[rng.integers(0, len(hubs), n)] + rng.normal(0, 0.05, size=(n, FACE_DIM)).astype(np.float32)
+    return vectors.astype(np.float32)
+
+class ElectionGenerator:
+    """
+    Reproducible synthetic election: booths, candidates, voters with face
+    encodings and a hash-chained vote ledger appended to the current tip.
+    Everything is written with bulk Core inserts in batches, and the same
+    seed always yields the same dataset (ledger hashes also depend on the
+    tip it is appended to).
+    """
+
+    def __init__(self, voters, constituencies, booths, candidates, votes, seed=0, prefix='SYN',
+                 batch_size=50000, start=None, hours=10, echo=print):
+        if votes > voters:
+            raise ValueError('Each voter votes at most once: votes must not exceed voters')
+        if booths < constituencies:
+            raise ValueError('Every constituency needs at least one booth')
+        self.n_voters, self.n_constituencies, self.n_booths = voters, constituencies, booths
+        self.n_candidates, self.n_votes = candidates, votes
+        self.prefix, self.batch_size, self.echo = prefix, batch_size, echo
+        self.start = start or datetime(2026, 4, 19, 7, 0, 0)
+        self.hours = hours
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+
+    def run(self):
+        if Voter.query.filter(Voter.voter_id.like(f'{self.prefix}%')).first() is not None:
+            raise ValueError(f"Voters with prefix {self.prefix!r} already exist; pick another --prefix")
+        started = time.perf_counter()
+        self._constituencies()
+        self._booths()
+        self._candidates()
+        self._voters()
+        self._votes()
+        total = rebuild_tallies()
+        self.echo(f"✅ Generated in {time.perf_counter() - started:.1f}s; tallies rebuilt over {total:,} vote(s)")
+
+    def _insert(self, model, rows):
+        db.session.execute(db.insert(model), rows)
+        db.session.commit()
+
+    # ---------------- Geography ----------------
+    def _constituencies(self):
+        self.constituency_names = [f'{self.prefix} AC-{i + 1}' for i in range(self.n_constituencies)]
+        self.constituency_states = [STATES[i % len(STATES)] for i in range(self.n_constituencies)]
+        # One assembly segment per seat, named after it
+        self._insert(AssemblyConstituency, [{'assembly': name, 'constituency': name, 'state': state}
+                                            for name, state in zip(self.constituency_names, self.constituency_states)])
+
+    def _booths(self):
+        # Booth j serves constituency j % M, so every seat gets at least one booth
+        self.booth_numbers = [f'{self.prefix}-B{j + 1}' for j in range(self.n_booths)]
+        self.booth_constituency = np.arange(self.n_booths) % self.n_constituencies
+        self.booth_parts = [f'Part-{j // self.n_constituencies + 1}' for j in range(self.n_booths)]
+        for lo in range(0, self.n_booths, self.batch_size):
+            self._insert(Booth, [{
+                'booth_number': self.booth_numbers[j],
+                'assembly': self.constituency_names[self.booth_constituency[j]],
+                'part_no': self.booth_parts[j],
+                'state': self.constituency_states[self.booth_constituency[j]],
+            } for j in range(lo, min(lo + self.batch_size, self.n_booths))])
+        self.echo(f"🏫 {self.n_booths:,} booths across {self.n_constituencies:,} constituencies")
+
+    def _candidates(self):
+        self.candidate_ids = [f'{self.prefix}-C{k + 1}' for k in range(self.n_candidates)]
+        # Candidate k contests constituency k % M; with fewer candidates than seats some get no ballot
+        self.candidate_constituency = np.arange(self.n_candidates) % self.n_constituencies
+        self._insert(Candidate, [{
+            'candidate_id': self.candidate_ids[k],
+            'name': f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}',
+            'party': self.random.choice(PARTIES),
+            'constituency': self.constituency_names[self.candidate_constituency[k]],
+            'state': self.constituency_states[self.candidate_constituency[k]],
+        } for k in range(self.n_candidates)])
+        self.echo(f"🗳️ {self.n_candidates:,} candidates")
+
+    # ---------------- Roll ----------------
+    def _voters(self):
+        self.voter_booth = self.rng.integers(0, self.n_booths, self.n_voters).astype(np.int32)
+        hubs = self.rng.normal(0, 0.12, size=(max(1, self.n_voters // 200), FACE_DIM)).astype(np.float32)
+        epoch = datetime(1950, 1, 1).date()
+        for lo in range(0, self.n_voters, self.batch_size):
+            hi = min(lo + self.batch_size, self.n_voters)
+            encodings = synthetic_encodings(self.rng, hubs, hi - lo)
+            ages = self.rng.integers(0, 365 * 55, hi - lo) # born 1950-2005
+            voters, embeddings = [], []
+            for i in range(lo, hi):
+                voter_id = self.voter_id(i)
+                booth = self.voter_booth[i]
+                constituency = self.booth_constituency[booth]
+                name = f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}'
+                face_image = f'synthetic://{voter_id}' # no photo on disk; keeps the stored encoding "fresh"
+                voters.append({
+                    'voter_id': voter_id, 'aadhaar': f'{self.prefix}{i:012d}', 'name': name,
+                    'dob': epoch + timedelta(days=int(ages[i - lo])), 'face_image': face_image,
+                    'father_name': f'{self.random.choice(FIRST_NAMES)} {name.split()[-1]}',
+                    'gender': self.random.choice(['Male', 'Female']),
+                    'address': f'House {self.random.randint(1, 999)}, {self.constituency_states[constituency]}',
+                    'assembly': self.constituency_names[constituency], 'part_no': self.booth_parts[booth],
+                    'serial_no': str(i + 1),
+                })
+                embeddings.append({'voter_id': voter_id, 'encoding': encodings[i - lo].tobytes(),
+                                   'source_image': face_image, 'updated_at': self.start})
+            db.session.execute(db.insert(Voter), voters)
+            self._insert(FaceEmbedding, embeddings)
+            self.echo(f"   👥 {hi:,}/{self.n_voters:,} voters")
+
+    def voter_id(self, i):
+        return f'{self.prefix}{i:09d}'
+
+    # ---------------- Ledger ----------------
+    def _votes(self):
+        if not self.n_votes:
+            return
+        voters = self.rng.permutation(self.n_voters)[:self.n_votes]
+        # Each voter picks a candidate of their own seat (or any, for a seat with none)
+        seat_candidates = [np.flatnonzero(self.candidate_constituency == c) for c in range(self.n_constituencies)]
+        everyone = np.arange(self.n_candidates)
+        picks = self.rng.random(self.n_votes)
+        # Arrivals spread over polling hours, strictly increasing
+        gaps = self.rng.exponential(self.hours * 3600e6 / self.n_votes, self.n_votes).astype(np.int64) + 1
+        offsets = np.cumsum(gaps)
+
+        tip = Vote.query.order_by(Vote.id.desc()).first()
+        next_id = tip.id + 1 if tip else 1
+        prev_hash = tip.block_hash if tip else '0' * 64
+        first_id = next_id
+        for lo in range(0, self.n_votes, self.batch_size):
+            rows = []
+            for n in range(lo, min(lo + self.batch_size, self.n_votes)):
+                i = int(voters[n])
+                booth = self.voter_booth[i]
+                pool = seat_candidates[self.booth_constituency[booth]]
+                pool = pool if len(pool) else everyone
+                candidate_id = self.candidate_ids[pool[int(picks[n] * len(pool))]]
+                voter_id = self.voter_id(i)
+                timestamp = self.start + timedelta(microseconds=int(offsets[n]))
+                block_hash = BlockchainUtils.calculate_hash(next_id, prev_hash, candidate_id, timestamp, 0)
+                rows.append({
+                    'id': next_id, 'voter_hash': hashlib.sha256(voter_id.encode()).hexdigest(),
+                    'candidate_id': candidate_id, 'booth_number': self.booth_numbers[booth],
+                    'timestamp': timestamp, 'receipt': BlockchainUtils.generate_receipt(voter_id, candidate_id, timestamp),
+                    'previous_hash': prev_hash, 'block_hash': block_hash, 'nonce': 0,
+                })
+                prev_hash, next_id = block_hash, next_id + 1
+            self._insert(Vote, rows)
+            self.echo(f"   ⛓️ {next_id - first_id:,}/{self.n_votes:,} blocks")
@@ -0,0 +1,58 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Vote, VoteTally
+
+ALL_BOOTHS = '*' # booth_number of the per-candidate total rows
+
+def increment_tally(candidate_id, booth_number, by=1):
+    """
+    Bump the per-booth and per-candidate counters. Runs inside the caller's
+    transaction so a vote and its tally commit (or roll back) together.
+    """
+    dialect = db.session.get_bind().dialect.name
+    for booth in (booth_number, ALL_BOOTHS):
+        if dialect in ('sqlite', 'postgresql'):
+            insert = (sqlite if dialect == 'sqlite' else postgresql).insert
+            stmt = insert(VoteTally).values(candidate_id=candidate_id, booth_number=booth, count=by)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['candidate_id', 'booth_number'],
+                set_={'count': VoteTally.count + by}
+            ))
+            continue
+        updated = VoteTally.query.filter_by(candidate_id=candidate_id, booth_number=booth).update(
+            {VoteTally.count: VoteTally.count + by}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(VoteTally(candidate_id=candidate_id, booth_number=booth, count=by))
+            db.session.flush()
+
+def candidate_totals():
+    """{candidate_id: votes}, one row per candidate."""
+    rows = db.session.query(VoteTally.candidate_id, VoteTally.count).filter(VoteTally.booth_number == ALL_BOOTHS)
+    return {cid: count for cid, count in rows}
+
+def booth_totals(booth_number):
+    rows = db.session.query(VoteTally.candidate_id, VoteTally.count).filter(VoteTally.booth_number == booth_number)
+    return {cid: count for cid, count in rows}
+
+def rebuild_tallies():
+    """Recompute every counter from the Vote ledger. Returns the total vote count."""
+    VoteTally.query.delete()
+    per_booth = db.session.query(Vote.candidate_id, Vote.booth_number, db.func.count(Vote.id)).group_by(
+        Vote.candidate_id, Vote.booth_number
+    ).all()
+    totals = {}
+    rows = []
+    for candidate_id, booth_number, count in per_booth:
+        rows.append({'candidate_id': candidate_id, 'booth_number': booth_number, 'count': count})
+        totals[candidate_id] = totals.get(candidate_id, 0) + count
+    rows += [{'candidate_id': cid, 'booth_number': ALL_BOOTHS, 'count': n} for cid, n in totals.items()]
+    if rows:
+        db.session.execute(db.insert(VoteTally), rows)
+    db.session.commit()
+    return sum(totals.values())
+
+def ensure_tallies():
+    """Build the counters once for a ledger that predates them."""
+    if VoteTally.query.first() is None and Vote.query.first() is not None:
+        rebuild_tallies()
@@ -1,12 +1,16 @@
+import io
 import os
+import numpy as np
 from werkzeug.utils import secure_filename
 from datetime import datetime
 from config import Config
+from models import db, FaceEmbedding
 
 # Optional face_recognition use
 # utils.py
 try:
     import face_recognition
+    from PIL import Image
     HAS_FR = True
     print("✅ DEBUG: Face Recognition library loaded successfully!") # <--- ADD THIS
 except Exception as e:
@@ -39,7 +43,96 @@ def encode_face_from_file(path):
         return None
     return encs[0]
 
+def load_face_array(data, max_side=640, max_pixels=16_000_000):
+    """
+    Decode an uploaded image (bytes) straight into an RGB ndarray, no temp file.
+    Images above max_pixels are refused; anything larger than max_side on its
+    longest edge is downscaled before detection.
+    """
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ValueError(f'Image too large ({width}x{height})')
+    # JPEG can be downscaled by the decoder itself, which is far cheaper
+    image.draft('RGB', (max_side, max_side))
+    image = image.convert('RGB')
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side))
+    return np.asarray(image)
+
+def sharpness(image, box):
+    """Variance of the Laplacian over the face crop; blurry frames score low."""
+    top, right, bottom, left = box
+    gray = image[top:bottom, left:right].mean(axis=2)
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    lap = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]) - 4 * gray[1:-1, 1:-1]
+    return float(lap.var())
+
+def encode_best_face(frames, max_side=640, max_pixels=16_000_000, model='hog'):
+    """
+    Pick the best face out of a burst of uploaded frames (bytes) and encode it.
+    Detection runs over every frame: one batched call with the CNN model,
+    frame by frame with HOG (dlib has no batched HOG detector). Each frame's
+    largest face is scored by area x sharpness and only the winner is encoded. Returns {'encoding', 'frame', 'quality', 'frames'} or None.
+    """
+    if not HAS_FR or not frames:
+        return None
+    images = [load_face_array(data, max_side, max_pixels) for data in frames]
+
+    if model == 'cnn' and len({img.shape for img in images}) == 1:
+        locations = face_recognition.batch_face_locations(images, number_of_times_to_upsample=0, batch_size=len(images))
+    else:
+        locations = [face_recognition.face_locations(img, model=model) for img in images]
+
+    best = None
+    for idx, (image, boxes) in enumerate(zip(images, locations)):
+        if not boxes:
+            continue
+        box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+        quality = (box[2] - box[0]) * (box[1] - box[3]) * sharpness(image, box)
+        if best is None or quality > best[0]:
+            best = (quality, idx, box)
+    if best is None:
+        return None
+
+    quality, idx, box = best
+    encs = face_recognition.face_encodings(images[idx], known_face_locations=[box])
+    if len(encs) == 0:
+        return None
+    return {'encoding': encs[0], 'frame': idx, 'quality': quality, 'frames': len(frames)}
+
 def compare_faces(known_encoding, unknown_encoding, tolerance=0.6):
     if not HAS_FR:
         return False
     return face_recognition.compare_faces([known_encoding], unknown_encoding, tolerance=tolerance)[0]
+
+# ---------------- Stored Embeddings ----------------
+def encoding_to_bytes(encoding):
+    return np.asarray(encoding, dtype=np.float32).tobytes()
+
+def encoding_from_bytes(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+def refresh_face_embedding(voter, force=False):
+    """
+    Make sure the stored encoding for `voter` matches its current face_image.
+    Encodes only when the row is missing, stale or `force` is set.
+    Returns the FaceEmbedding (or None). Caller is responsible for commit.
+    """
+    emb = FaceEmbedding.query.filter_by(voter_id=voter.voter_id).first()
+    if emb and not force and emb.source_image == voter.face_image:
+        return emb
+
+    enc = encode_face_from_file(voter.face_image) if voter.face_image else None
+    if enc is None:
+        # Never keep an encoding that no longer belongs to the voter's photo
+        if emb: db.session.delete(emb)
+        return None
+
+    if not emb:
+        emb = FaceEmbedding(voter_id=voter.voter_id)
+        db.session.add(emb)
+    emb.encoding = encoding_to_bytes(enc)
+    emb.source_image = voter.face_image
+    return emb
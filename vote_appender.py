@@ -0,0 +1,233 @@
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Vote, BallotStatus
+from blockchain import BlockchainUtils
+from tally import increment_tally
+from events import broker
+from epochs import seal_epochs
+from chain_audit import verify_chain
+from metrics import metrics
+
+GENESIS_HASH = "0" * 64
+SEAL_CHECK_SECONDS = 1.0 # how often the writer looks for a Merkle epoch to seal
+LEDGER_LOCK_ID = 0x766f7465 # PostgreSQL advisory lock key held while appending
+
+class AppenderBusy(Exception):
+    """Raised when the vote queue is full."""
+
+class VoteAppender:
+    """
+    The single writer of the vote ledger. Casting a vote only enqueues it;
+    one thread drains the queue in order, reads the chain tip once per batch,
+    assigns each vote its id, previous_hash and block_hash in sequence and
+    commits up to VOTE_BATCH_SIZE votes in one transaction, waiting no longer
+    than VOTE_BATCH_WAIT_MS for a batch to fill. Callers get their receipt
+    only once that commit has returned.
+
+    Ids are assigned explicitly, so a writer in another process that raced
+    for the same tip loses on the primary key and retries on the new tip
+    instead of forking the chain.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._sealed_at = 0.0
+        self._checkpointed_at = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self._queue = queue.Queue(maxsize=app.config['VOTE_QUEUE_SIZE'])
+        # Also started by the first request, not only the first vote: an idle writer still seals the last epoch
+        app.before_request(self._ensure_thread)
+
+    def _ensure_thread(self):
+        # Started on first use so it runs in the serving (post-fork) process
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='vote-appender', daemon=True)
+                self._thread.start()
+
+    def submit(self, voter_id, candidate_id, booth_number):
+        """Queue a vote; the Future resolves to (http_status, payload)."""
+        self._ensure_thread()
+        future = Future()
+        try:
+            self._queue.put_nowait((voter_id, candidate_id, booth_number, future))
+        except queue.Full:
+            raise AppenderBusy()
+        return future
+
+    def cast(self, voter_id, candidate_id, booth_number):
+        """Queue a vote and wait for its durable commit. Returns (http_status, payload)."""
+        try:
+            future = self.submit(voter_id, candidate_id, booth_number)
+        except AppenderBusy:
+            metrics.inc('votes_rejected_total', status='503')
+            return 503, {'status': 'error', 'message': 'Vote queue full, please retry'}
+        try:
+            return future.result(timeout=self.app.config['VOTE_COMMIT_TIMEOUT'])
+        except Exception:
+            # The ballot stays bound to this voter, so a late commit cannot be doubled
+            return 503, {'status': 'error', 'message': 'Vote not confirmed yet, please check with the booth officer'}
+
+    # ---------------- Writer Thread ----------------
+    def _run(self):
+        max_batch = self.app.config['VOTE_BATCH_SIZE']
+        max_wait = self.app.config['VOTE_BATCH_WAIT_MS'] / 1000.0
+        # Wake up while idle too, so a partial epoch is sealed once it is MERKLE_EPOCH_SECONDS old
+        # (at most half that late) and the checkpoint catches up after polls close
+        idle = max(SEAL_CHECK_SECONDS, self.app.config['MERKLE_EPOCH_SECONDS'] / 2)
+        while True:
+            try:
+                batch = [self._queue.get(timeout=idle)]
+            except queue.Empty:
+                with self.app.app_context():
+                    self._seal_epochs()
+                    self._checkpoint_chain()
+                continue
+            deadline = time.monotonic() + max_wait
+            while len(batch) < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                self._commit_batch(batch)
+                self._seal_epochs()
+                self._checkpoint_chain()
+
+    def _seal_epochs(self):
+        # Off the callers' path: their receipts were already handed back
+        if time.monotonic() - self._sealed_at < SEAL_CHECK_SECONDS:
+            return
+        self._sealed_at = time.monotonic()
+        try:
+            seal_epochs()
+        except Exception:
+            db.session.rollback()
+
+    def _checkpoint_chain(self):
+        # Checkpoints are only signed here and by the CLI, never by a public request
+        if time.monotonic() - self._checkpointed_at < self.app.config['CHAIN_CHECKPOINT_SECONDS']:
+            return
+        self._checkpointed_at = time.monotonic()
+        try:
+            report = verify_chain(record=True, max_blocks=self.app.config['CHAIN_CHECKPOINT_MAX_BLOCKS'])
+            if not report['is_valid']:
+                self.app.logger.warning('Chain checkpoint not advanced: %s', report['message'])
+        except Exception:
+            db.session.rollback()
+            self.app.logger.exception('Chain checkpoint failed')
+
+    def _commit_batch(self, batch, attempts=3):
+        results = self._write(batch, attempts)
+        booths = set()
+        for (voter_id, candidate_id, booth_number, future), result in zip(batch, results):
+            if result[0] == 200:
+                booths.add(booth_number)
+                metrics.inc('votes_committed_total')
+            else:
+                metrics.inc('votes_rejected_total', status=str(result[0]))
+            future.set_result(result)
+        if booths:
+            broker.publish('votes')
+            for booth_number in booths:
+                broker.publish(f'booth:{booth_number}')
+
+    def _write(self, batch, attempts):
+        """Append and commit a batch; returns a result per request."""
+        for attempt in range(attempts):
+            try:
+                results = self._append(batch)
+                db.session.commit()
+                return results
+            except IntegrityError:
+                # Another process appended at the same tip, or recorded one of these
+                # voters first (uq_vote_voter_hash): re-read both and retry
+                db.session.rollback()
+                failure = (503, {'status': 'error', 'message': 'Ledger busy, please retry'})
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Vote batch of %d failed', len(batch))
+                # Driver/SQL text stays in the server log, never on a booth screen
+                failure = (500, {'status': 'error', 'message': 'Vote not recorded, please retry'})
+                break
+        if len(batch) > 1:
+            # One bad vote must not reject its neighbours: write them one at a time
+            results = []
+            for item in batch:
+                results += self._write([item], attempts)
+            return results
+        return [failure]
+
+    @staticmethod
+    def _lock_ledger():
+        """
+        Take the database write lock before the tip is read, so writers in
+        other worker processes queue behind this batch (up to busy_timeout)
+        instead of racing it for the same block ids.
+        """
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            # A no-op write makes SQLite take its RESERVED lock right away
+            db.session.execute(db.text("UPDATE vote SET id = id WHERE 0"))
+        elif dialect == 'postgresql':
+            db.session.execute(db.select(db.func.pg_advisory_xact_lock(LEDGER_LOCK_ID)))
+
+    def _append(self, batch):
+        """Stage one batch on top of the current tip; returns a result per request."""
+        self._lock_ledger()
+        tip = Vote.query.order_by(Vote.id.desc()).first()
+        next_id = tip.id + 1 if tip else 1
+        prev_hash = tip.block_hash if tip else GENESIS_HASH
+        voter_hashes = {voter_id: hashlib.sha256(voter_id.encode()).hexdigest() for voter_id, *_ in batch}
+        # Already recorded (e.g. a ballot re-activated by override); one unique-index lookup per batch
+        voted = {h for (h,) in db.session.query(Vote.voter_hash).filter(Vote.voter_hash.in_(set(voter_hashes.values())))}
+        results, counts = [], {}
+        for voter_id, candidate_id, booth_number, _ in batch:
+            # Re-checked here: the ballot may have been used by an earlier vote in this batch
+            bs = BallotStatus.query.filter_by(voter_id=voter_id, booth_number=booth_number, is_active=True).first()
+            if not bs:
+                results.append((403, {'status': 'error', 'message': 'Ballot not active or session expired'}))
+                continue
+            voter_hash = voter_hashes[voter_id]
+            if voter_hash in voted:
+                bs.is_active = False
+                results.append((403, {'status': 'error', 'message': 'Vote already recorded for this voter'}))
+                continue
+            voted.add(voter_hash)
+            timestamp = datetime.utcnow()
+            receipt = BlockchainUtils.generate_receipt(voter_id, candidate_id, timestamp)
+            nonce = 0
+            block_hash = BlockchainUtils.calculate_hash(next_id, prev_hash, candidate_id, timestamp, nonce)
+            db.session.add(Vote(
+                id=next_id, voter_hash=voter_hash,
+                candidate_id=candidate_id, booth_number=booth_number, receipt=receipt, timestamp=timestamp,
+                previous_hash=prev_hash, block_hash=block_hash, nonce=nonce
+            ))
+            # Deactivate ballot immediately
+            bs.is_active = False
+            counts[(candidate_id, booth_number)] = counts.get((candidate_id, booth_number), 0) + 1
+            results.append((200, {'status': 'ok', 'message': 'Vote recorded on Blockchain', 'receipt': receipt, 'block': next_id}))
+            prev_hash, next_id = block_hash, next_id + 1
+        db.session.flush()
+        for (candidate_id, booth_number), n in counts.items():
+            increment_tally(candidate_id, booth_number, by=n)
+        return results
+
+vote_appender = VoteAppender()